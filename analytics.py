@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Derived return metrics for every stock, computed once per build.
+
+Each price series is turned into epoch-day and close arrays a single time
+and every metric is read off those arrays: covered years, returns over the
+standard windows, the headline "best period" used by the OG images, CAGR,
+max drawdown and the outcome of investing SUMMARY_AMOUNT kr. build_data.py
+writes the result to public/data/summary.json, which the page, sitemap and
+OG generators read instead of re-parsing the full series. It also writes
+chart series per stock for the calculator: {ticker}.lod.json with the
+history at daily, weekly and monthly resolution, and {ticker}.growth.json
+with each calculator period ready to scale. {ticker}.stats.json holds the
+best, worst and median return over every rolling 1, 5, 10 and 20 years,
+and {ticker}.dca.json the outcome of saving 1 kr a month over each
+calculator period.
+
+    python analytics.py   # rebuild the summary and every per-stock file from the existing data
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import build_state
+import price_cache
+import price_store
+
+DATA_DIR = Path(__file__).parent / 'public' / 'data'
+SUMMARY_FILE = DATA_DIR / 'summary.json'
+
+SUMMARY_AMOUNT = 10_000
+SUMMARY_PERIODS = [1, 2, 5, 10, 20, 'max']
+
+# Periods offered by the calculator, and the points GrowthChart plots
+GROWTH_PERIODS = [1, 2, 5, 10, 20]
+CHART_POINTS = 50
+
+# Chart resolutions: (name, years covered or None for all, max points or None
+# to keep every day). The calculator picks the first level covering a period.
+LOD_LEVELS = [
+    ('daily', 1, None),
+    ('weekly', 5, 260),
+    ('monthly', None, 300),
+]
+CLOSE_SCALE = 100
+
+# Holding periods for the rolling best/worst/median returns
+ROLLING_WINDOWS = [1, 5, 10, 20]
+
+# The OG image headline prefers the last ten years unless the full history
+# is much better, and names the start year once a series covers 15 years.
+BEST_WINDOW_YEARS = 10
+BEST_WINDOW_SLACK = 180
+BEST_WINDOW_SHARE = 0.7
+SINCE_START_YEARS = 15
+
+
+def load_series(data: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Epoch days and closes of a stock data file, as arrays. Stocks read from
+    the price store carry them already, under 'series'."""
+    if 'series' in data:
+        return data['series']
+    prices = data['prices']
+    days = np.array([p['date'] for p in prices], dtype='datetime64[D]').astype(np.int64)
+    closes = np.array([p['close'] for p in prices], dtype=np.float64)
+    return days, closes
+
+
+def to_date(day) -> str:
+    return str(np.datetime64(int(day), 'D'))
+
+
+def years_before(day: int, years: int) -> int:
+    """Epoch day of the same calendar date `years` earlier (Feb 29 -> Feb 28)."""
+    date = np.datetime64(int(day), 'D').item()
+    try:
+        earlier = date.replace(year=date.year - years)
+    except ValueError:
+        earlier = date.replace(year=date.year - years, day=28)
+    return int(np.datetime64(earlier, 'D').astype(np.int64))
+
+
+def add_months(days: np.ndarray, months) -> np.ndarray:
+    """Epoch days of the same days of the month `months` later (an int or an
+    array broadcast against `days`), clipped to the end of shorter months."""
+    dates = np.asarray(days).astype('datetime64[D]')
+    start_months = dates.astype('datetime64[M]')
+    later = start_months + np.asarray(months)
+    month_days = ((later + 1).astype('datetime64[D]') - later.astype('datetime64[D]')).astype(np.int64)
+    day_of_month = np.minimum((dates - start_months.astype('datetime64[D]')).astype(np.int64), month_days - 1)
+    return later.astype('datetime64[D]').astype(np.int64) + day_of_month
+
+
+def add_years(days: np.ndarray, years: int) -> np.ndarray:
+    """Epoch days of the same calendar dates `years` later (Feb 29 -> Feb 28),
+    for a whole array at once."""
+    return add_months(days, 12 * years)
+
+
+def find_start_index(days: np.ndarray, target: int) -> int | None:
+    """Index of the point closest to `target`, at most a week after it.
+
+    Mirrors Calculator.findClosestDateIndex (ties go to the earlier point),
+    but returns None when the series starts too late to cover the target.
+    """
+    last = np.searchsorted(days, target + 7, side='right') - 1
+    if last < 0:
+        return None
+    before = np.searchsorted(days, target, side='right') - 1
+    candidates = [i for i in (before, before + 1) if 0 <= i <= last]
+    return int(min(candidates, key=lambda i: abs(days[i] - target)))
+
+
+def max_drawdown(days: np.ndarray, closes: np.ndarray) -> dict | None:
+    """Deepest peak-to-trough fall, as a negative fraction with its dates."""
+    if len(closes) < 2:
+        return None
+    peaks = np.maximum.accumulate(closes)
+    drawdowns = closes / peaks - 1
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(closes[:trough + 1]))
+    return {
+        'depth': round(float(drawdowns[trough]), 6),
+        'peakDate': to_date(days[peak]),
+        'troughDate': to_date(days[trough]),
+    }
+
+
+def summarize_period(days: np.ndarray, closes: np.ndarray, period) -> dict:
+    """Returns over a period ending at the latest price. A period reaching
+    back before the data starts from the first point, as Calculator and
+    growth_series() do, so the overview and calculator agree on young listings."""
+    if period == 'max':
+        start = 0
+    else:
+        start = find_start_index(days, years_before(days[-1], period)) or 0
+
+    start_price = float(closes[start])
+    end_price = float(closes[-1])
+    years = (days[-1] - days[start]) / 365.25
+    growth = end_price / start_price
+    drawdown = max_drawdown(days[start:], closes[start:])
+    return {
+        'startDate': to_date(days[start]),
+        'startPrice': start_price,
+        'endPrice': end_price,
+        'finalValue': round(SUMMARY_AMOUNT * growth, 2),
+        'cagr': round(growth ** (1 / years) - 1, 6) if years > 0 else None,
+        'maxDrawdown': drawdown['depth'] if drawdown else None,
+    }
+
+
+def best_return(days: np.ndarray, closes: np.ndarray) -> dict:
+    """The headline outcome of SUMMARY_AMOUNT kr: the last ten years if that is
+    at least 70% of the full-history result, otherwise the full history."""
+    latest_price = closes[-1]
+    total_years = (days[-1] - days[0]) / 365.25
+    total_return = int((latest_price / closes[0]) * SUMMARY_AMOUNT)
+
+    if total_years >= BEST_WINDOW_YEARS:
+        # First point within half a year of the date ten years back
+        target = years_before(days[-1], BEST_WINDOW_YEARS)
+        i = int(np.searchsorted(days, target - BEST_WINDOW_SLACK, side='right'))
+        if i < len(days) and days[i] < target + BEST_WINDOW_SLACK:
+            window_return = int((latest_price / closes[i]) * SUMMARY_AMOUNT)
+            if window_return and window_return > total_return * BEST_WINDOW_SHARE:
+                return {'finalValue': window_return, 'years': BEST_WINDOW_YEARS,
+                        'startDate': to_date(days[i]), 'sinceStart': False}
+
+    return {'finalValue': total_return, 'years': int(total_years),
+            'startDate': to_date(days[0]), 'sinceStart': bool(total_years >= SINCE_START_YEARS)}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point, and from each of threshold - 2 equal
+    buckets in between the point forming the largest triangle with the
+    previously kept point and the next bucket's average, so peaks and
+    crashes survive where plain striding would step over them.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    every = (count - 2) / (threshold - 2)
+    # Bucket i is [edges[i], edges[i + 1]); the last point is a bucket of its own
+    edges = np.append((np.arange(threshold - 1) * every).astype(np.int64) + 1, count)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y, edges[:-1]) / sizes
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, count - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def daily_series(data: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Daily closes over the published series' range from the price cache,
+    or the published (weekly) points when the cache has no history."""
+    days, closes = load_series(data)
+    cached = price_cache.load(data['ticker'])
+    if cached is None:
+        return days, closes
+    cached_days = cached.index.values.astype('datetime64[D]').astype(np.int64)
+    cached_closes = np.round(cached['Close'].to_numpy(), 2)
+    keep = (cached_days >= days[0]) & (cached_days <= days[-1]) & ~np.isnan(cached_closes)
+    if not keep.any():
+        return days, closes
+    return cached_days[keep], cached_closes[keep]
+
+
+def lod_levels(days: np.ndarray, closes: np.ndarray) -> dict:
+    """Each LOD level as (days, closes) arrays, from a daily series."""
+    levels = {}
+    for name, years, max_points in LOD_LEVELS:
+        start = 0 if years is None else int(np.searchsorted(days, years_before(days[-1], years)))
+        level_days, level_closes = days[start:], closes[start:]
+        if max_points is not None:
+            positions = lttb(level_days, level_closes, max_points)
+            level_days, level_closes = level_days[positions], level_closes[positions]
+        levels[name] = (level_days, level_closes)
+    return levels
+
+
+def lod_file(data: dict, levels: dict) -> dict:
+    """LOD levels in the columnar encoding of {ticker}.col.json."""
+    return {
+        'ticker': data['ticker'],
+        'name': data['name'],
+        'scale': CLOSE_SCALE,
+        'levels': {
+            name: {
+                'years': years,
+                'days': np.diff(levels[name][0], prepend=0).tolist(),
+                'close': np.rint(levels[name][1] * CLOSE_SCALE).astype(np.int64).tolist(),
+            }
+            for name, years, _ in LOD_LEVELS
+        },
+    }
+
+
+def level_for(years: int) -> str:
+    """First LOD level covering a period of `years`."""
+    return next(name for name, level_years, _ in LOD_LEVELS if level_years is None or level_years >= years)
+
+
+def growth_series(data: dict, levels: dict | None = None) -> dict:
+    """Value of 1 kr invested at the start of each calculator period, at chart
+    resolution, so the browser only has to scale it by the amount.
+
+    Start and end prices come from the published series and periods end at
+    the latest price, like the summary; a period reaching back before the
+    data starts from the first point, as Calculator does. The points in
+    between come from the LOD level for the period, downsampled with LTTB.
+    """
+    days, closes = load_series(data)
+    if levels is None:
+        levels = lod_levels(days, closes)
+    periods = {}
+    for period in GROWTH_PERIODS:
+        start = find_start_index(days, years_before(days[-1], period)) or 0
+        level_days, level_closes = levels[level_for(period)]
+        after = int(np.searchsorted(level_days, days[start], side='right'))
+        series_days = np.concatenate([days[start:start + 1], level_days[after:]])
+        series_closes = np.concatenate([closes[start:start + 1], level_closes[after:]])
+        positions = lttb(series_days, series_closes, CHART_POINTS)
+        periods[str(period)] = {
+            'startDate': to_date(days[start]),
+            'startPrice': float(closes[start]),
+            'endPrice': float(closes[-1]),
+            'dates': np.datetime_as_string(series_days[positions].astype('datetime64[D]')).tolist(),
+            'growth': np.round(series_closes[positions] / closes[start], 6).tolist(),
+        }
+    return {'ticker': data['ticker'], 'name': data['name'], 'periods': periods}
+
+
+def rolling_returns(days: np.ndarray, closes: np.ndarray, years: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return of every `years`-long holding period in the series.
+
+    A period starting on each price ends on the first price on or after the
+    same date `years` later; starts too late to have one are left out.
+    Returns start and end positions with one return per period, from a
+    single searchsorted pass over the sorted targets and no Python loop.
+    """
+    ends = np.searchsorted(days, add_years(days, years))
+    starts = np.flatnonzero(ends < len(days))
+    ends = ends[starts]
+    return starts, ends, closes[ends] / closes[starts] - 1
+
+
+def rolling_stats(days: np.ndarray, closes: np.ndarray) -> dict:
+    """Best, worst and median return over every rolling window, with dates.
+
+    The median is the lower middle period, found with a partition rather
+    than a sort, so it is an actual period with its own dates.
+    """
+    stats = {}
+    for years in ROLLING_WINDOWS:
+        starts, ends, returns = rolling_returns(days, closes, years)
+        if not len(returns):
+            stats[str(years)] = None
+            continue
+
+        middle = (len(returns) - 1) // 2
+        picks = {
+            'best': int(np.argmax(returns)),
+            'worst': int(np.argmin(returns)),
+            'median': int(np.argpartition(returns, middle)[middle]),
+        }
+        stats[str(years)] = {'periods': len(returns)}
+        for label, i in picks.items():
+            stats[str(years)][label] = {
+                'return': round(float(returns[i]), 6),
+                'cagr': round(float((1 + returns[i]) ** (1 / years) - 1), 6),
+                'startDate': to_date(days[starts[i]]),
+                'endDate': to_date(days[ends[i]]),
+            }
+    return stats
+
+
+def monthly_savings(days: np.ndarray, closes: np.ndarray) -> dict:
+    """Outcome of investing 1 kr every month over each calculator period.
+
+    `days` and `closes` are the daily series. A period starts at its first
+    day on or after the same date `years` before the latest day (or at the
+    first day, if the data is shorter), and in each of its 12 * years months
+    1 kr buys units at the first price on or after the same day of the
+    month. Units are a cumulative sum of 1 / price over the purchases, so
+    any monthly amount is these tables scaled by the amount. The value per
+    point is taken at each purchase (after buying) and at the latest price,
+    downsampled to chart resolution with LTTB like the growth series.
+    """
+    periods = {}
+    for period in GROWTH_PERIODS:
+        start = find_start_index(days, years_before(days[-1], period)) or 0
+        targets = add_months(days[start], np.arange(12 * period))
+        buys = np.searchsorted(days, targets[targets <= days[-1]])
+
+        units = np.cumsum(1 / closes[buys])
+        invested = np.arange(1, len(buys) + 1)
+        points, held = buys, units
+        if buys[-1] != len(days) - 1:
+            points, held = np.append(buys, len(days) - 1), np.append(units, units[-1])
+            invested = np.append(invested, len(buys))
+        values = held * closes[points]
+        positions = lttb(days[points], values, CHART_POINTS)
+        periods[str(period)] = {
+            'startDate': to_date(days[buys[0]]),
+            'months': int(len(buys)),
+            'units': float(units[-1]),
+            'endPrice': float(closes[-1]),
+            'dates': np.datetime_as_string(days[points[positions]].astype('datetime64[D]')).tolist(),
+            'invested': invested[positions].tolist(),
+            'value': np.round(values[positions], 6).tolist(),
+        }
+    return periods
+
+
+def analyze(data: dict) -> dict:
+    """Every derived metric for one stock data file."""
+    days, closes = load_series(data)
+    return {
+        'name': data['name'],
+        'firstDate': to_date(days[0]),
+        'lastDate': to_date(days[-1]),
+        'points': len(days),
+        'best': best_return(days, closes),
+        'maxDrawdown': max_drawdown(days, closes),
+        'periods': {str(period): summarize_period(days, closes, period) for period in SUMMARY_PERIODS},
+    }
+
+
+def build_summary(stocks: dict) -> dict:
+    """Analytics for every ticker (ticker -> analyze() result), so consumers
+    need one small file. Callers analyze each stock as it streams past."""
+    return {
+        'amount': SUMMARY_AMOUNT,
+        'periods': [str(period) for period in SUMMARY_PERIODS],
+        'stocks': stocks,
+        'updated': datetime.now().isoformat(),
+    }
+
+
+def write_summary(stocks: dict, path: Path = SUMMARY_FILE, state: dict | None = None) -> dict:
+    """Build and write the summary, skipping the write if only the timestamp changed."""
+    summary = build_summary(stocks)
+    own_state = state is None
+    if own_state:
+        state = build_state.load()
+    key = build_state.hash_inputs({k: v for k, v in summary.items() if k != 'updated'})
+    build_state.write_output(state, path, json.dumps(summary, separators=(',', ':')), key)
+    if own_state:
+        build_state.save(state)
+    return summary
+
+
+def stock_files(data: dict) -> dict:
+    """Contents of the derived per-stock files, by suffix: {ticker}.lod.json,
+    {ticker}.growth.json, the rolling-window {ticker}.stats.json and the
+    monthly-savings {ticker}.dca.json."""
+    days, closes = daily_series(data)
+    levels = lod_levels(days, closes)
+    return {
+        'lod': lod_file(data, levels),
+        'growth': growth_series(data, levels),
+        'stats': {'ticker': data['ticker'], 'windows': rolling_stats(days, closes)},
+        'dca': {'ticker': data['ticker'], 'name': data['name'], 'periods': monthly_savings(days, closes)},
+    }
+
+
+def iter_datasets():
+    """Every indexed stock as (ticker, data), one at a time: from the price
+    store when it is at least as new as the index (build_data.py writes it
+    last) and from the data files otherwise."""
+    index_file = DATA_DIR / 'index.json'
+    store = price_store.open_store()
+    if store is not None and store.path.stat().st_mtime < index_file.stat().st_mtime:
+        store = None
+
+    for entry in json.loads(index_file.read_text()):
+        ticker = entry['ticker']
+        if store is not None and ticker in store:
+            yield ticker, {'ticker': ticker, 'name': store.name(ticker), 'series': store.series(ticker)}
+        else:
+            yield ticker, json.loads((DATA_DIR / f'{ticker}.json').read_text())
+
+
+def main():
+    state = build_state.load()
+    stocks = {}
+    for ticker, data in iter_datasets():
+        for suffix, content in stock_files(data).items():
+            build_state.write_output(state, DATA_DIR / f'{ticker}.{suffix}.json',
+                                     json.dumps(content, separators=(',', ':')))
+        stocks[ticker] = analyze(data)
+    summary = write_summary(stocks, state=state)
+    build_state.save(state)
+    print(f"Summary, chart series, rolling stats and savings tables saved for {len(summary['stocks'])} stocks")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the history frame -> sampled price list conversion.
+
+Compares the original per-row path (hist.iterrows() plus an enumerate pass
+in sample_weekly) against build_data.history_to_prices on synthetic 25-year
+daily frames, and checks both produce identical output.
+
+    python benchmarks/bench_convert.py --tickers 1 100 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import build_data  # noqa: E402
+from synthetic import make_history  # noqa: E402
+
+
+def legacy_convert(hist: pd.DataFrame) -> list:
+    prices = [
+        {'date': date.strftime('%Y-%m-%d'), 'close': round(row['Close'], 2)}
+        for date, row in hist.iterrows()
+    ]
+    if len(prices) <= 1100:
+        return prices
+    sampled = []
+    for i, p in enumerate(prices):
+        if i % 5 == 0 or i == len(prices) - 1:
+            sampled.append(p)
+    return sampled
+
+
+def vectorized_convert(hist: pd.DataFrame) -> list:
+    return build_data.history_to_prices(hist, build_data.sample_stride(len(hist)))
+
+
+def run(convert, frames: list) -> float:
+    start = time.perf_counter()
+    for hist in frames:
+        convert(hist)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--days', type=int, default=6300, help='daily rows per ticker')
+    args = parser.parse_args()
+
+    frames = [make_history(args.days, seed, end='2026-01-02', tz='America/New_York') for seed in range(8)]
+    for hist in frames:
+        assert legacy_convert(hist) == vectorized_convert(hist)
+
+    print(f"{args.days} daily rows per ticker\n")
+    print(f"{'tickers':>8} {'iterrows s':>11} {'vectorized s':>13} {'speedup':>8}")
+    for count in args.tickers:
+        batch = [frames[i % len(frames)] for i in range(count)]
+        legacy = run(legacy_convert, batch)
+        vectorized = run(vectorized_convert, batch)
+        print(f"{count:>8} {legacy:>11.3f} {vectorized:>13.3f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+// Benchmark the Calculator start-date lookup: the original linear scan that
+// parses every date string against the binary search over epoch days.
+//
+// Runs every ticker in public/data against every period and checks both
+// lookups agree. Needs the dev dependencies installed (npm install).
+//
+//   node benchmarks/bench_date_lookup.mjs [iterations]
+
+import { readdirSync, readFileSync } from 'node:fs'
+import { loadModule } from './load-ts.mjs'
+
+const { decodeColumnar, findClosestDayIndex } = await loadModule('src/calculator.ts')
+
+const ITERATIONS = Number(process.argv[2] ?? 200)
+const PERIODS = [1, 2, 5, 10, 20]
+
+function legacyFindClosestDateIndex(prices, targetDate) {
+  const targetTime = targetDate.getTime()
+  let closestIdx = 0
+  let closestDiff = Infinity
+
+  for (let i = 0; i < prices.length; i++) {
+    const priceDate = new Date(prices[i].date).getTime()
+    const diff = Math.abs(priceDate - targetTime)
+
+    if (diff < closestDiff && priceDate <= targetTime + 7 * 24 * 60 * 60 * 1000) {
+      closestDiff = diff
+      closestIdx = i
+    }
+  }
+
+  return closestIdx
+}
+
+const stocks = readdirSync('public/data')
+  .filter(name => name.endsWith('.col.json'))
+  .map(name => decodeColumnar(JSON.parse(readFileSync(`public/data/${name}`, 'utf8'))))
+
+const targets = PERIODS.map(years => {
+  const date = new Date()
+  date.setFullYear(date.getFullYear() - years)
+  return date
+})
+
+for (const stock of stocks) {
+  for (const target of targets) {
+    const expected = legacyFindClosestDateIndex(stock.prices, target)
+    const actual = findClosestDayIndex(stock.days, target.getTime())
+    if (expected !== actual) {
+      throw new Error(`${stock.ticker} ${target.toISOString()}: linear ${expected}, binary ${actual}`)
+    }
+  }
+}
+
+function time(label, lookup) {
+  const start = performance.now()
+  let sink = 0
+  for (let n = 0; n < ITERATIONS; n++) {
+    for (const stock of stocks) {
+      for (const target of targets) sink += lookup(stock, target)
+    }
+  }
+  const ms = performance.now() - start
+  const lookups = ITERATIONS * stocks.length * targets.length
+  console.log(`${label.padEnd(8)} ${ms.toFixed(1).padStart(9)} ms  ${((ms * 1000) / lookups).toFixed(3).padStart(8)} us/lookup`)
+  return sink
+}
+
+console.log(`${stocks.length} tickers x ${PERIODS.length} periods x ${ITERATIONS} iterations\n`)
+time('linear', (stock, target) => legacyFindClosestDateIndex(stock.prices, target))
+time('binary', (stock, target) => findClosestDayIndex(stock.days, target.getTime()))
@@ -0,0 +1,61 @@
+// Benchmark Calculator.calculateMonthly with the precomputed savings tables
+// against simulating every purchase over the full price series, as the
+// browser runs it: fetch() is served from public/data and every ticker is
+// calculated for every standard period.
+//
+// Checks that both give the same months, amount invested and final value,
+// then reports latency per call. Needs the dev dependencies installed
+// (npm install).
+//
+//   node benchmarks/bench_dca.mjs [iterations]
+
+import { readdirSync, readFileSync } from 'node:fs'
+import { loadModule } from './load-ts.mjs'
+
+const { Calculator } = await loadModule('src/calculator.ts')
+
+const ITERATIONS = Number(process.argv[2] ?? 200)
+const PERIODS = [1, 2, 5, 10, 20]
+const MONTHLY = 500
+
+globalThis.fetch = async url => {
+  try {
+    const body = readFileSync(`public${url}`, 'utf8')
+    return { ok: true, json: async () => JSON.parse(body) }
+  } catch {
+    return { ok: false, json: async () => null }
+  }
+}
+
+const calculator = new Calculator()
+const tickers = readdirSync('public/data')
+  .filter(name => name.endsWith('.dca.json'))
+  .map(name => name.slice(0, -'.dca.json'.length))
+
+for (const ticker of tickers) {
+  for (const years of PERIODS) {
+    const table = await calculator.calculateMonthly(ticker, MONTHLY, years)
+    const loop = await calculator.calculateMonthlyFromPrices(ticker, MONTHLY, years)
+    const problems = [
+      table.months !== loop.months && 'months',
+      table.invested !== loop.invested && 'invested',
+      Math.abs(table.finalValue - loop.finalValue) > loop.finalValue * 1e-9 && 'final value',
+    ].filter(Boolean)
+    if (problems.length) throw new Error(`${ticker} ${years}y: savings table differs in ${problems.join(', ')}`)
+  }
+}
+
+async function run(label, calculate) {
+  for (const ticker of tickers) for (const years of PERIODS) await calculate(ticker, years)
+
+  const start = performance.now()
+  for (let n = 0; n < ITERATIONS; n++) {
+    for (const ticker of tickers) for (const years of PERIODS) await calculate(ticker, years)
+  }
+  const calls = ITERATIONS * tickers.length * PERIODS.length
+  console.log(`${label.padEnd(8)} ${(((performance.now() - start) * 1000) / calls).toFixed(1).padStart(8)} us/call`)
+}
+
+console.log(`${tickers.length} tickers x ${PERIODS.length} periods x ${ITERATIONS} iterations\n`)
+await run('loop', (ticker, years) => calculator.calculateMonthlyFromPrices(ticker, MONTHLY, years))
+await run('tables', (ticker, years) => calculator.calculateMonthly(ticker, MONTHLY, years))
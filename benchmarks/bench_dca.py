@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Check and benchmark the monthly-savings tables in analytics.py.
+
+Simulates saving 1 kr a month with a plain Python loop, one purchase at a
+time, and checks that monthly_savings() gives the same months, units,
+invested amounts and values for every published stock and a set of
+synthetic daily series, then times both on the synthetic ones.
+
+    python benchmarks/bench_dca.py --tickers 100 --days 6300
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import analytics  # noqa: E402
+from synthetic import make_series  # noqa: E402
+
+
+def same_day_next_months(day: int, months: int) -> int:
+    start = date.fromordinal(date(1970, 1, 1).toordinal() + int(day))
+    year, month = divmod(start.month - 1 + months, 12)
+    for day_of_month in range(start.day, 0, -1):
+        try:
+            return (date(start.year + year, month + 1, day_of_month) - date(1970, 1, 1)).days
+        except ValueError:
+            continue
+
+
+def loop_savings(days: np.ndarray, closes: np.ndarray, years: int) -> dict:
+    """Buy 1 kr of units each month, scanning for the price to buy at.
+    Returns the units held and the value right after each purchase."""
+    start = analytics.find_start_index(days, analytics.years_before(days[-1], years)) or 0
+    units, values, i = 0.0, [], start
+    for month in range(12 * years):
+        target = same_day_next_months(days[start], month)
+        if target > days[-1]:
+            break
+        while days[i] < target:
+            i += 1
+        units += 1 / closes[i]
+        values.append(units * closes[i])
+    return {'months': len(values), 'units': units, 'values': values}
+
+
+def check(days: np.ndarray, closes: np.ndarray, label: str) -> None:
+    tables = analytics.monthly_savings(days, closes)
+    for years in analytics.GROWTH_PERIODS:
+        table, expected = tables[str(years)], loop_savings(days, closes, years)
+        assert table['months'] == expected['months'], f"{label} {years}y: months differ"
+        assert np.isclose(table['units'], expected['units'], rtol=1e-12), f"{label} {years}y: units differ"
+        final = expected['units'] * closes[-1]
+        assert np.isclose(table['value'][-1], final, atol=1e-6), f"{label} {years}y: final value differs"
+        # Chart points before the latest price are purchases, found by months invested
+        for invested, value in zip(table['invested'][:-1], table['value'][:-1]):
+            purchase = expected['values'][invested - 1]
+            assert np.isclose(value, purchase, atol=1e-6), f"{label} {years}y: chart value differs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--days', type=int, default=6300, help='daily rows per synthetic series')
+    args = parser.parse_args()
+
+    data_dir = analytics.DATA_DIR
+    for entry in json.loads((data_dir / 'index.json').read_text()):
+        data = json.loads((data_dir / f"{entry['ticker']}.json").read_text())
+        check(*analytics.load_series(data), entry['ticker'])
+
+    series = [make_series(args.days, seed) for seed in range(args.tickers)]
+    for seed, (days, closes) in enumerate(series[:5]):
+        check(days, closes, f'synthetic {seed}')
+    print("tables match the loop simulation\n")
+
+    started = time.perf_counter()
+    for days, closes in series:
+        analytics.monthly_savings(days, closes)
+    vectorized = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for days, closes in series:
+        for years in analytics.GROWTH_PERIODS:
+            loop_savings(days, closes, years)
+    loop = time.perf_counter() - started
+
+    print(f"{args.tickers} tickers x {args.days} daily rows, periods {analytics.GROWTH_PERIODS} years")
+    print(f"vectorized {vectorized:>7.2f} s  ({vectorized / args.tickers * 1000:.2f} ms per ticker)")
+    print(f"loop       {loop:>7.2f} s  ({loop / args.tickers * 1000:.2f} ms per ticker)")
+
+
+if __name__ == '__main__':
+    main()
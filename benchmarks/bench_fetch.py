@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent ticker fetching in build_data.py.
+
+Replaces yf.Ticker with a stub that sleeps for a fixed latency before
+returning a synthetic 25-year daily history, so the numbers show how wall
+time scales with the worker count without touching the network.
+
+    python benchmarks/bench_fetch.py --tickers 200 --latency 0.2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import build_data  # noqa: E402
+from synthetic import make_history  # noqa: E402
+
+
+class StubTicker:
+    latency = 0.0
+    history_frame = None
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+
+    def history(self, **kwargs) -> pd.DataFrame:
+        time.sleep(self.latency)
+        return self.history_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per stubbed request')
+    parser.add_argument('--days', type=int, default=6300, help='daily rows per stubbed history')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    StubTicker.latency = args.latency
+    StubTicker.history_frame = make_history(args.days, end=pd.Timestamp.today().normalize())
+    build_data.yf.Ticker = StubTicker
+
+    tickers = [f'T{i:04d}' for i in range(args.tickers)]
+    print(f"{args.tickers} tickers x {args.days} rows, {args.latency * 1000:.0f} ms latency per request\n")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = build_data.fetch_all(tickers, workers=workers, retries=0, cache=False)
+        elapsed = time.perf_counter() - start
+        assert list(results) == tickers
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
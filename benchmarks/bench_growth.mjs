@@ -0,0 +1,96 @@
+// Benchmark Calculator.calculate with the precomputed growth series against
+// slicing the full price series, as the browser runs it: fetch() is served
+// from public/data and every ticker is calculated for every standard period.
+//
+// Checks that each growth series starts and ends where the sliced full
+// series does and stays within its range, then reports latency per call and
+// heap retained per result. Needs the dev dependencies installed (npm install).
+//
+//   node --expose-gc benchmarks/bench_growth.mjs [iterations]
+
+import { readdirSync, readFileSync } from 'node:fs'
+import { loadModule } from './load-ts.mjs'
+
+const { Calculator, findClosestDayIndex, scaleGrowth } = await loadModule('src/calculator.ts')
+
+const ITERATIONS = Number(process.argv[2] ?? 200)
+const PERIODS = [1, 2, 5, 10, 20]
+const AMOUNT = 10_000
+const CHART_POINTS = 50
+const DAY_MS = 24 * 60 * 60 * 1000
+
+globalThis.fetch = async url => {
+  try {
+    const body = readFileSync(`public${url}`, 'utf8')
+    return { ok: true, json: async () => JSON.parse(body) }
+  } catch {
+    return { ok: false, json: async () => null }
+  }
+}
+
+const calculator = new Calculator()
+const tickers = readdirSync('public/data')
+  .filter(name => name.endsWith('.growth.json'))
+  .map(name => name.slice(0, -'.growth.json'.length))
+
+// Each growth series must start at the sliced series' start price, end at its
+// final value and stay within the range of the full series it was drawn from
+for (const ticker of tickers) {
+  const data = await calculator.loadStockData(ticker)
+  const growth = await calculator.loadGrowthData(ticker)
+  const end = new Date(data.days[data.days.length - 1] * DAY_MS)
+  for (const years of PERIODS) {
+    const target = new Date(end)
+    target.setUTCFullYear(target.getUTCFullYear() - years)
+    const start = findClosestDayIndex(data.days, target.getTime())
+    const shares = AMOUNT / data.prices[start].close
+    const closes = data.prices.slice(start).map(p => p.close)
+    const [low, high] = [Math.min(...closes) * shares, Math.max(...closes) * shares]
+
+    const result = scaleGrowth(ticker, AMOUNT, growth.periods[years])
+    const { history } = result
+    const first = history[0]
+    const last = history[history.length - 1]
+    const problems = [
+      first.date !== data.prices[start].date && 'start date',
+      Math.abs(first.value - AMOUNT) > AMOUNT * 1e-5 && 'start value',
+      Math.abs(last.value - result.finalValue) > result.finalValue * 1e-5 && 'final value',
+      history.length > CHART_POINTS && 'point count',
+      history.some((p, i) => i > 0 && p.date <= history[i - 1].date) && 'date order',
+      history.some(p => p.value < low * (1 - 1e-2) || p.value > high * (1 + 1e-2)) && 'value range',
+    ].filter(Boolean)
+    if (problems.length) throw new Error(`${ticker} ${years}y: growth series differs in ${problems.join(', ')}`)
+  }
+}
+
+async function run(label, calculate) {
+  // Warm up, then time
+  for (const ticker of tickers) for (const years of PERIODS) await calculate(ticker, years)
+
+  const start = performance.now()
+  for (let n = 0; n < ITERATIONS; n++) {
+    for (const ticker of tickers) for (const years of PERIODS) await calculate(ticker, years)
+  }
+  const ms = performance.now() - start
+  const calls = ITERATIONS * tickers.length * PERIODS.length
+
+  // Heap retained by one result per ticker and period
+  globalThis.gc?.()
+  const before = process.memoryUsage().heapUsed
+  const kept = []
+  for (const ticker of tickers) for (const years of PERIODS) kept.push(await calculate(ticker, years))
+  globalThis.gc?.()
+  const bytes = (process.memoryUsage().heapUsed - before) / kept.length
+  const points = kept.reduce((sum, result) => sum + result.history.length, 0) / kept.length
+
+  console.log(
+    `${label.padEnd(8)} ${((ms * 1000) / calls).toFixed(1).padStart(8)} us/call` +
+    `  ${points.toFixed(0).padStart(5)} points  ${(bytes / 1024).toFixed(1).padStart(7)} KiB/result`,
+  )
+}
+
+console.log(`${tickers.length} tickers x ${PERIODS.length} periods x ${ITERATIONS} iterations`)
+if (!globalThis.gc) console.log('(run with --expose-gc for stable heap numbers)')
+console.log()
+await run('sliced', (ticker, years) => calculator.calculateFromPrices(ticker, AMOUNT, years))
+await run('growth', (ticker, years) => calculator.calculate(ticker, AMOUNT, years))
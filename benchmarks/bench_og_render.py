@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark OG image rendering across process pool sizes.
+
+Renders a synthetic list of stocks into a temporary directory with 1..N
+workers, reports wall time and speedup, and checks that every worker count
+produces PNGs byte-identical to the serial run.
+
+    python benchmarks/bench_og_render.py --stocks 200 --workers 1 2 4 8
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_og_images as og  # noqa: E402
+
+
+def synthetic_jobs(count: int, out_dir: Path) -> list:
+    rng = random.Random(0)
+    return [
+        (f"Aktie {i:03d}", rng.randrange(5_000, 10_000_000), f"siden {rng.randrange(1990, 2020)}", out_dir / f"stock-{i:03d}.png")
+        for i in range(count)
+    ]
+
+
+def digest(paths: list) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, *[n for n in (2, 4, 8, 16) if n < cpus], cpus})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    args = parser.parse_args()
+
+    print(f"{args.stocks} images, {cpus} CPUs\n")
+    print(f"{'workers':>8} {'seconds':>9} {'img/s':>7} {'speedup':>8}")
+
+    baseline = None
+    reference = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = synthetic_jobs(args.stocks, Path(tmp))
+            start = time.perf_counter()
+            og.render_images(jobs, workers)
+            elapsed = time.perf_counter() - start
+
+            result = digest([job[3] for job in jobs])
+            reference = reference or result
+            assert result == reference, f"{workers} workers produced different PNG bytes"
+
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {args.stocks / elapsed:>7.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
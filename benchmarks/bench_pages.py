@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark stock page generation at site scale.
+
+Generates a synthetic registry of stock pages into a temporary directory
+with each writer thread count, reports pages/s, and fails if the best run
+misses the throughput target. The old per-page cross-link sort is timed on
+a sample of pages and extrapolated, for comparison.
+
+    python benchmarks/bench_pages.py --pages 5000 --workers 1 4 8 --target 2000
+"""
+
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_pages as pages  # noqa: E402
+
+LEGACY_SAMPLE = 100
+
+
+def synthetic_stocks(count: int) -> tuple[list, dict]:
+    stocks = [{"ticker": f"T{i:05d}", "name": f"Aktie {i}", "slug": f"aktie-{i}"} for i in range(count)]
+    summary = {"stocks": {
+        s["ticker"]: {"firstDate": f"{1990 + i % 30}-01-02", "lastDate": "2026-02-13"}
+        for i, s in enumerate(stocks)
+    }}
+    return stocks, summary
+
+
+def legacy_cross_links(stocks: list, ticker: str) -> list:
+    """The previous per-page selection: sort every other stock by a pair hash."""
+    return sorted(
+        [s for s in stocks if s["ticker"] != ticker],
+        key=lambda s: hashlib.md5(f"{ticker}-{s['ticker']}".encode()).hexdigest(),
+    )[:4]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--target", type=float, default=2000, help="minimum pages/s for the best run")
+    args = parser.parse_args()
+
+    stocks, summary = synthetic_stocks(args.pages)
+
+    started = time.perf_counter()
+    for stock in stocks[:LEGACY_SAMPLE]:
+        legacy_cross_links(stocks, stock["ticker"])
+    legacy = (time.perf_counter() - started) / min(LEGACY_SAMPLE, args.pages) * args.pages
+
+    started = time.perf_counter()
+    pages.cross_link_map(stocks)
+    ring = time.perf_counter() - started
+
+    print(f"{args.pages} stock pages\n")
+    print(f"cross-links: per-page sort ~{legacy:.2f} s (extrapolated), ring {ring * 1000:.1f} ms\n")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9}")
+
+    best = 0.0
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            results = pages.write_stock_pages(stocks, summary, {}, root=Path(tmp), workers=workers)
+            elapsed = time.perf_counter() - started
+            assert len(results) == args.pages and all(written for _, written in results)
+
+        rate = args.pages / elapsed
+        best = max(best, rate)
+        print(f"{workers:>8} {elapsed:>9.2f} {rate:>9.0f}")
+
+    print(f"\nbest {best:.0f} pages/s, target {args.target:.0f}: {'ok' if best >= args.target else 'MISSED'}")
+    if best < args.target:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rolling-window return stats in analytics.py.
+
+Runs rolling_stats() over synthetic 25-year daily series for many tickers,
+checks every window's returns against a plain Python loop on one series,
+and times that loop on a sample for comparison.
+
+    python benchmarks/bench_rolling.py --tickers 300 --days 6300
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import analytics  # noqa: E402
+from synthetic import make_series  # noqa: E402
+
+LOOP_SAMPLE = 500
+
+
+def loop_returns(days: np.ndarray, closes: np.ndarray, years: int, starts: int | None = None) -> list:
+    """Each window found by scanning forward from its start, as a loop would."""
+    returns = []
+    for i in range(starts or len(days)):
+        target = analytics.years_before(days[i], -years)
+        j = i
+        while j < len(days) and days[j] < target:
+            j += 1
+        if j == len(days):
+            break
+        returns.append(closes[j] / closes[i] - 1)
+    return returns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=300)
+    parser.add_argument('--days', type=int, default=6300, help='daily rows per series')
+    args = parser.parse_args()
+
+    series = [make_series(args.days, seed) for seed in range(args.tickers)]
+
+    days, closes = series[0]
+    for years in analytics.ROLLING_WINDOWS:
+        _, _, returns = analytics.rolling_returns(days, closes, years)
+        assert np.allclose(returns, loop_returns(days, closes, years)), f"{years}y returns differ"
+
+    started = time.perf_counter()
+    for days, closes in series:
+        analytics.rolling_stats(days, closes)
+    vectorized = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for years in analytics.ROLLING_WINDOWS:
+        loop_returns(days, closes, years, starts=LOOP_SAMPLE)
+    loop = (time.perf_counter() - started) / LOOP_SAMPLE * args.days * args.tickers
+
+    print(f"{args.tickers} tickers x {args.days} daily rows, windows {analytics.ROLLING_WINDOWS} years\n")
+    print(f"vectorized {vectorized:>8.2f} s  ({vectorized / args.tickers * 1000:.1f} ms per ticker)")
+    print(f"loop       {loop:>8.2f} s  (extrapolated from {LOOP_SAMPLE} starts)")
+
+
+if __name__ == '__main__':
+    main()
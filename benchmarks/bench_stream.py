@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of a full build_data.py run against the ticker count.
+
+Each run copies the build modules into a temporary directory, so every
+output lands there, and runs build_data.run() in a fresh process with
+yf.Ticker stubbed to return a synthetic 25-year daily history from
+synthetic.make_history(). Reports
+wall time and peak RSS per ticker count; with streaming, RSS should stay
+flat as the ticker list grows.
+
+    python benchmarks/bench_stream.py --tickers 15 1000 --stride 1
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ['build_data.py', 'analytics.py', 'build_state.py', 'price_cache.py', 'price_store.py', 'stocks.py']
+BENCH_DIR = Path(__file__).resolve().parent
+
+CHILD = '''
+import json, resource, sys, time
+import pandas as pd
+import build_data
+from synthetic import make_history
+
+count, days, stride = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+frame = make_history(days, end=pd.Timestamp.today().normalize())
+
+
+class StubTicker:
+    def __init__(self, ticker):
+        pass
+
+    def history(self, **kwargs):
+        return frame.copy()
+
+
+build_data.yf.Ticker = StubTicker
+build_data.TICKERS = [f'T{i:05d}' for i in range(count)]
+argv = ['--no-cache', '--workers', '4'] + (['--stride', stride] if stride != 'auto' else [])
+started = time.perf_counter()
+build_data.run(build_data.parse_args(argv))
+seconds = time.perf_counter() - started
+print(json.dumps({'seconds': seconds, 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+'''
+
+
+def run(count: int, days: int, stride: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in MODULES:
+            shutil.copy(ROOT / module, tmp)
+        shutil.copy(BENCH_DIR / 'synthetic.py', tmp)
+        result = subprocess.run([sys.executable, '-c', CHILD, str(count), str(days), stride],
+                                cwd=tmp, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[15, 1000])
+    parser.add_argument('--days', type=int, default=6300, help='daily rows per stubbed history')
+    parser.add_argument('--stride', default='1', help="sampling stride, or 'auto' for the weekly default")
+    args = parser.parse_args()
+
+    print(f"{args.days} daily rows per ticker, stride {args.stride}\n")
+    print(f"{'tickers':>8} {'seconds':>9} {'peak RSS MiB':>13}")
+    for count in args.tickers:
+        result = run(count, args.days, args.stride)
+        print(f"{count:>8} {result['seconds']:>9.2f} {result['rss'] / 1024:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+// Load a dependency-free TypeScript module from src/ into Node for the
+// benchmarks, transpiling it with the project's own TypeScript compiler.
+
+import { readFileSync } from 'node:fs'
+import { resolve } from 'node:path'
+import ts from 'typescript'
+
+export async function loadModule(path) {
+  const source = readFileSync(resolve(path), 'utf8')
+  const { outputText } = ts.transpileModule(source, {
+    compilerOptions: { module: ts.ModuleKind.ESNext, target: ts.ScriptTarget.ES2022 },
+  })
+  return import(`data:text/javascript;base64,${Buffer.from(outputText).toString('base64')}`)
+}
@@ -0,0 +1,18 @@
+"""Synthetic price series shared by the benchmarks."""
+
+import numpy as np
+import pandas as pd
+
+
+def make_history(days: int, seed: int = 0, end='2026-02-13', tz: str | None = None) -> pd.DataFrame:
+    """A yfinance-like frame of `days` business days ending on `end`, with a
+    seeded random-walk 'Close' column."""
+    index = pd.bdate_range(end=pd.Timestamp(end), periods=days, tz=tz)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, days)))
+    return pd.DataFrame({'Close': close}, index=index)
+
+
+def make_series(days: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """make_history() as epoch days and closes rounded to cents."""
+    hist = make_history(days, seed)
+    return hist.index.values.astype('datetime64[D]').astype(np.int64), np.round(hist['Close'].to_numpy(), 2)
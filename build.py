@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Run the site build as one process.
+
+Stages run in dependency order and hand data over in memory: the analytics
+summary from the data stage goes straight to the page, sitemap and OG
+stages instead of being written and re-read by separate scripts. A stage
+left out with --only/--skip is taken as already built, and the stages after
+it read its output from disk, so the build can be resumed from any point.
+
+    python build.py --incremental      # everything, as the weekly workflow runs it
+    python build.py --skip data        # rebuild from the committed data files
+    python build.py --only og --force  # re-render the OG images
+
+Options not listed below are passed on to build_data.py (see its --help).
+"""
+
+import argparse
+import os
+import sys
+import time
+from graphlib import TopologicalSorter
+
+
+# Stage modules are imported inside the stages, so a partial build only
+# loads what it needs (pages and sitemap run without numpy or Pillow).
+
+def stage_data(context: dict) -> None:
+    import build_data
+    context['summary'] = build_data.run(context['data_args'])
+
+
+def stage_pages(context: dict) -> None:
+    import generate_pages
+    generate_pages.run(context.get('summary'))
+
+
+def stage_sitemap(context: dict) -> None:
+    import generate_sitemap
+    generate_sitemap.run(context.get('summary'), compress=context['args'].gzip_sitemaps)
+
+
+def stage_og(context: dict) -> None:
+    import generate_og_images
+    args = context['args']
+    generate_og_images.configure(generate_og_images.build_parser().parse_args([]))
+    generate_og_images.run(context.get('summary'), force=args.force, workers=args.og_workers)
+
+
+def stage_compress(context: dict) -> None:
+    import compress_assets
+    compress_assets.compress_assets(compress_assets.default_targets())
+
+
+# name: (dependencies, function)
+STAGES = {
+    'data': ((), stage_data),
+    'pages': (('data',), stage_pages),
+    'sitemap': (('data',), stage_sitemap),
+    'og': (('data',), stage_og),
+    'compress': (('data', 'sitemap'), stage_compress),
+}
+
+
+def stage_order(selected: set) -> list:
+    graph = TopologicalSorter({name: deps for name, (deps, _) in STAGES.items()})
+    return [name for name in graph.static_order() if name in selected]
+
+
+def print_report(timings: list, failed: str | None = None) -> None:
+    print(f"\n{'stage':<10} {'seconds':>8}")
+    for name, seconds in timings:
+        print(f"{name:<10} {seconds:>8.2f}" + ('  FAILED' if name == failed else ''))
+    print(f"{'total':<10} {sum(seconds for _, seconds in timings):>8.2f}")
+
+
+def parse_args(argv=None) -> tuple[argparse.Namespace, list]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=STAGES, metavar='STAGE',
+                        help=f"run just these stages ({', '.join(STAGES)})")
+    parser.add_argument('--skip', nargs='+', choices=STAGES, default=[], metavar='STAGE',
+                        help='run every stage except these')
+    parser.add_argument('--force', action='store_true', help='re-render OG images even if unchanged')
+    parser.add_argument('--gzip-sitemaps', action='store_true', help='write sitemap shards as .xml.gz')
+    parser.add_argument('--og-workers', type=int, default=os.cpu_count() or 1,
+                        help='OG render processes (default: CPU count)')
+    return parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, data_argv = parse_args(argv)
+    selected = set(args.only or STAGES) - set(args.skip)
+    order = stage_order(selected)
+
+    context = {'args': args}
+    if 'data' in selected:
+        import build_data
+        context['data_args'] = build_data.parse_args(data_argv)
+    elif data_argv:
+        sys.exit(f"unrecognized arguments: {' '.join(data_argv)}")
+
+    timings = []
+    for name in order:
+        print(f"\n== {name} ==")
+        started = time.perf_counter()
+        try:
+            STAGES[name][1](context)
+        except BaseException:
+            timings.append((name, time.perf_counter() - started))
+            print_report(timings, failed=name)
+            raise
+        timings.append((name, time.perf_counter() - started))
+
+    print_report(timings)
+
+
+if __name__ == '__main__':
+    main()
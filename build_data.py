@@ -4,120 +4,581 @@ Fetch historical stock data and generate JSON files for FirstInvestor.
 Run weekly via GitHub Actions to keep data fresh.
 """
 
+import argparse
+import itertools
 import json
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import yfinance as yf
 
-TICKERS = [
-    # Market index
-    '^GSPC',
-    # Danish stocks (5yr positive)
-    'NOVO-B.CO',
-    'MAERSK-B.CO',
-    'DSV.CO',
-    'CARL-B.CO',
-    'DANSKE.CO',
-    # Big tech / online
-    'AAPL',
-    'AMZN',
-    'GOOGL',
-    'META',
-    'NFLX',
-    'MSFT',
-    # Meme stocks (5yr positive)
-    'GME',
-    'TSLA',
-    'NVDA',
-]
-NAMES = {
-    # Market
-    '^GSPC': 'S&P 500',
-    # Danish
-    'NOVO-B.CO': 'Novo Nordisk',
-    'MAERSK-B.CO': 'Mærsk',
-    'DSV.CO': 'DSV',
-    'CARL-B.CO': 'Carlsberg',
-    'DANSKE.CO': 'Danske Bank',
-    # Big tech
-    'AAPL': 'Apple',
-    'AMZN': 'Amazon',
-    'GOOGL': 'Google',
-    'META': 'Meta',
-    'NFLX': 'Netflix',
-    'MSFT': 'Microsoft',
-    # Meme
-    'GME': 'GameStop',
-    'TSLA': 'Tesla',
-    'NVDA': 'NVIDIA',
-}
+import analytics
+import build_state
+import price_cache
+import price_store
+from stocks import NAMES, TICKERS, load_summary
 
 OUTPUT_DIR = Path(__file__).parent / 'public' / 'data'
+CHECKPOINT_FILE = Path(__file__).parent / '.cache' / 'build-data.checkpoint'
 
+SAMPLE_THRESHOLD = 1100
+SAMPLE_STRIDE = 5
 
-def sample_weekly(prices: list) -> list:
-    """Sample to weekly data to reduce file size."""
-    if len(prices) <= 1100:
+CLOSE_SCALE = 100
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+DEFAULT_CACHE_TTL = timedelta(hours=20)
+DEFAULT_CHUNK_SIZE = 20
+HISTORY_YEARS = 25
+# Tickers between index.json and build-state.json checkpoints
+CHECKPOINT_EVERY = 100
+
+# Yahoo requests made by this process, by kind ('history' or 'download')
+request_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def count_request(kind: str) -> None:
+    with _counts_lock:
+        request_counts[kind] += 1
+
+
+def sample_positions(count: int, stride: int) -> np.ndarray:
+    """Row positions kept by sampling: every `stride`-th row plus the last."""
+    positions = np.arange(0, count, stride)
+    if count and positions[-1] != count - 1:
+        positions = np.append(positions, count - 1)
+    return positions
+
+
+def sample_weekly(prices: list, stride: int | None = None) -> list:
+    """Sample to weekly data to reduce file size.
+
+    Keeps every `stride`-th point plus the last one. Without an explicit
+    stride, long series use SAMPLE_STRIDE and short ones are left daily.
+    """
+    if stride is None:
+        stride = sample_stride(len(prices))
+    if stride == 1:
         return prices
-    sampled = []
-    for i, p in enumerate(prices):
-        if i % 5 == 0 or i == len(prices) - 1:
-            sampled.append(p)
-    return sampled
+    return [prices[i] for i in sample_positions(len(prices), stride)]
 
 
-def fetch_stock_data(ticker: str, years: int = 25) -> dict:
-    """Fetch historical data for a ticker."""
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=years * 365)
+def sample_stride(count: int) -> int:
+    return SAMPLE_STRIDE if count > SAMPLE_THRESHOLD else 1
 
+
+def fetch_history(ticker: str, start: datetime, end: datetime, timeout: float = DEFAULT_TIMEOUT) -> pd.DataFrame:
+    """Fetch the raw daily OHLCV frame for a ticker, indexed by local trading date."""
+    count_request('history')
     stock = yf.Ticker(ticker)
-    hist = stock.history(start=start_date, end=end_date)
+    hist = stock.history(start=start, end=end, timeout=timeout)
 
     if hist.empty:
         raise ValueError(f"No data found for {ticker}")
 
-    prices = [
-        {'date': date.strftime('%Y-%m-%d'), 'close': round(row['Close'], 2)}
-        for date, row in hist.iterrows()
-    ]
+    if hist.index.tz is not None:
+        hist.index = hist.index.tz_localize(None)
+    return hist
+
+
+def fetch_bulk(tickers: list, start: datetime, end: datetime, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """Fetch raw daily OHLCV frames for several tickers in one yf.download request.
+
+    The wide frame is split back into one frame per ticker, keeping only the
+    days that ticker traded. Tickers that came back without any rows are
+    left out, for the caller to fetch individually.
+    """
+    count_request('download')
+    frame = yf.download(tickers, start=start, end=end, timeout=timeout, group_by='ticker',
+                        auto_adjust=True, actions=False, progress=False, threads=False)
+    if frame is None or frame.empty:
+        return {}
+    if frame.index.tz is not None:
+        frame.index = frame.index.tz_localize(None)
+
+    histories = {}
+    grouped = isinstance(frame.columns, pd.MultiIndex)
+    for ticker in tickers:
+        if grouped:
+            if ticker not in frame.columns.get_level_values(0):
+                continue
+            hist = frame[ticker]
+        elif len(tickers) == 1:
+            hist = frame
+        else:
+            continue
+        hist = hist.dropna(subset=['Close'])
+        if not hist.empty:
+            histories[ticker] = hist
+    return histories
+
 
-    prices = sample_weekly(prices)
+def history_to_prices(hist: pd.DataFrame, stride: int = 1) -> list:
+    """Convert a history frame to price points, sampling on the index first.
 
+    Date formatting and rounding run vectorized over the kept rows only.
+    """
+    if stride > 1:
+        hist = hist.iloc[sample_positions(len(hist), stride)]
+    index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    dates = np.datetime_as_string(index.values, unit='D').tolist()
+    closes = hist['Close'].round(2).tolist()
+    return [{'date': date, 'close': close} for date, close in zip(dates, closes)]
+
+
+def fetch_daily_prices(ticker: str, start: datetime, end: datetime, timeout: float = DEFAULT_TIMEOUT) -> list:
+    """Fetch unsampled daily closes for a ticker between start and end."""
+    return history_to_prices(fetch_history(ticker, start, end, timeout=timeout))
+
+
+def load_history(
+    ticker: str,
+    years: int = HISTORY_YEARS,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: bool = True,
+    ttl: timedelta = DEFAULT_CACHE_TTL,
+    offline: bool = False,
+    incremental: bool = False,
+) -> pd.DataFrame:
+    """Raw daily history for the last `years`, served from the local cache when fresh.
+
+    A stale cache entry is extended with only the missing days when
+    `incremental` is set, and refetched in full otherwise. `offline` never
+    touches the network and uses the cache regardless of age.
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+
+    cached = price_cache.load(ticker) if cache or offline else None
+    if cached is not None and (offline or price_cache.is_fresh(ticker, ttl)):
+        return cached[cached.index >= start_date]
+    if offline:
+        raise ValueError(f"No cached history for {ticker}")
+
+    hist = None
+    if incremental and cached is not None and len(cached):
+        delta = fetch_history(ticker, cached.index[-1].to_pydatetime(), end_date, timeout=timeout)
+        hist = stitch_history(cached, delta)
+
+    if hist is None:
+        hist = fetch_history(ticker, start_date, end_date, timeout=timeout)
+
+    hist = hist[hist.index >= start_date]
+    if cache:
+        price_cache.save(ticker, hist)
+    return hist
+
+
+def stitch_history(cached: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame | None:
+    """The cached history extended with a delta fetched from its last day or earlier.
+
+    Returns None unless the overlapping day is unchanged, i.e. unless no
+    split or dividend has re-adjusted the history since it was cached.
+    """
+    last_day = cached.index[-1]
+    delta = delta[delta.index >= last_day]
+    if delta.empty or delta.index[0] != last_day or not np.isclose(delta['Close'].iloc[0], cached['Close'].iloc[-1]):
+        return None
+    return pd.concat([cached.iloc[:-1], delta[price_cache.COLUMNS]])
+
+
+def load_bulk_histories(
+    tickers: list,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    years: int = HISTORY_YEARS,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: bool = True,
+    ttl: timedelta = DEFAULT_CACHE_TTL,
+    offline: bool = False,
+    incremental: bool = False,
+) -> dict:
+    """Raw daily histories as load_history() returns them, fetched `chunk_size`
+    tickers per request.
+
+    Fresh cache entries are used as is. The rest are downloaded in chunks:
+    cached tickers from their last cached day when `incremental` is set, the
+    others in full. Tickers a chunk returned empty, whose delta no longer
+    lines up with the cache, or whose chunk failed are left out, for the
+    caller to fetch individually.
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+
+    histories = {}
+    stale = {}
+    for ticker in tickers:
+        cached = price_cache.load(ticker) if cache or offline else None
+        if cached is not None and (offline or price_cache.is_fresh(ticker, ttl)):
+            histories[ticker] = cached[cached.index >= start_date]
+        elif not offline:
+            stale[ticker] = cached if incremental and cached is not None and len(cached) else None
+
+    names = list(stale)
+    for i in range(0, len(names), max(1, chunk_size)):
+        chunk = names[i:i + max(1, chunk_size)]
+        extend = [ticker for ticker in chunk if stale[ticker] is not None]
+        full = [ticker for ticker in chunk if stale[ticker] is None]
+        requests = []
+        if extend:
+            requests.append((extend, min(stale[ticker].index[-1] for ticker in extend).to_pydatetime()))
+        if full:
+            requests.append((full, start_date))
+
+        for group, start in requests:
+            try:
+                fetched = fetch_bulk(group, start, end_date, timeout=timeout)
+            except Exception as error:
+                print(f"  bulk request for {len(group)} tickers failed: {error}")
+                continue
+            for ticker, hist in fetched.items():
+                if stale[ticker] is not None:
+                    hist = stitch_history(stale[ticker], hist)
+                    if hist is None:
+                        continue
+                hist = hist[hist.index >= start_date]
+                if cache:
+                    price_cache.save(ticker, hist)
+                histories[ticker] = hist
+
+    return histories
+
+
+def build_stock_data(ticker: str, prices: list, stride: int) -> dict:
     return {
         'ticker': ticker,
         'name': NAMES.get(ticker, ticker),
+        'stride': stride,
         'prices': prices,
         'updated': datetime.now().isoformat(),
     }
 
 
-def main():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+def to_columnar(data: dict) -> dict:
+    """Columnar encoding of a stock's prices for the browser.
+
+    Dates become epoch days (days since 1970-01-01), delta-encoded so the
+    first entry is absolute and the rest are offsets from the previous
+    point. Closes become integers in hundredths (they are already rounded to
+    2 decimals). This drops the repeated keys and date strings, and the
+    browser can binary-search the decoded days directly.
+    """
+    prices = data['prices']
+    days = np.array([p['date'] for p in prices], dtype='datetime64[D]').astype(np.int64)
+    closes = np.rint(np.array([p['close'] for p in prices]) * CLOSE_SCALE).astype(np.int64)
+    return {
+        'ticker': data['ticker'],
+        'name': data['name'],
+        'scale': CLOSE_SCALE,
+        'days': np.diff(days, prepend=0).tolist(),
+        'close': closes.tolist(),
+    }
 
-    index = []
 
-    for ticker in TICKERS:
-        print(f"Fetching {ticker}...")
+def fetch_stock_data(
+    ticker: str,
+    years: int = HISTORY_YEARS,
+    timeout: float = DEFAULT_TIMEOUT,
+    stride: int | None = None,
+    **cache_options,
+) -> dict:
+    """Fetch historical data for a ticker."""
+    hist = load_history(ticker, years, timeout=timeout, **cache_options)
+    return history_to_stock_data(ticker, hist, stride)
+
+
+def history_to_stock_data(ticker: str, hist: pd.DataFrame, stride: int | None = None) -> dict:
+    stride = stride or sample_stride(len(hist))
+    return build_stock_data(ticker, history_to_prices(hist, stride), stride)
+
+
+def load_stock_data(ticker: str) -> dict | None:
+    path = OUTPUT_DIR / f'{ticker}.json'
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def update_stock_data(
+    ticker: str,
+    existing: dict,
+    years: int = HISTORY_YEARS,
+    timeout: float = DEFAULT_TIMEOUT,
+    **options,
+) -> dict:
+    """Extend a previously saved series with only the days since it was written.
+
+    The last stored point is always kept by sampling even when it is off the
+    stride grid, so the delta is fetched from the point before it, which is
+    always on the grid. Re-sampling the delta from there continues the grid
+    exactly where the stored series left off. Files without a recorded
+    stride (written before incremental mode), or saved with a different one
+    than the run asks for, get a full refresh instead, fetched with the
+    run's cache and stride `options`. The grid stays anchored on the first
+    stored day, so the result matches a full refresh over the stored range
+    rather than one started today.
+    """
+    stored = existing.get('prices', [])
+    stride = existing.get('stride')
+    if stride is None or len(stored) < 2 or options.get('stride') not in (None, stride):
+        return fetch_stock_data(ticker, years, timeout=timeout, **options)
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+    anchor = stored[-2]
+
+    delta = fetch_daily_prices(ticker, datetime.strptime(anchor['date'], '%Y-%m-%d'), end_date, timeout=timeout)
+    if delta[0] != anchor:
+        # A split or dividend re-adjusted the history (or the anchor day is
+        # gone), so the stored prices no longer line up with Yahoo's
+        return fetch_stock_data(ticker, years, timeout=timeout, **options)
+
+    cutoff = start_date.strftime('%Y-%m-%d')
+    if stride == 1:
+        daily = [p for p in stored[:-2] + delta if p['date'] >= cutoff]
+        stride = sample_stride(len(daily))
+        prices = sample_weekly(daily, stride)
+    else:
+        # Dropping whole sampled points keeps the remaining grid intact
+        prices = [p for p in stored[:-2] + sample_weekly(delta, stride) if p['date'] >= cutoff]
+
+    return build_stock_data(ticker, prices, stride)
+
+
+def fetch_with_retry(
+    ticker: str,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    timeout: float = DEFAULT_TIMEOUT,
+    incremental: bool = False,
+    **options,
+) -> dict:
+    """Fetch a ticker, retrying failed attempts with exponential backoff.
+
+    Incremental runs extend the raw cache when it has the ticker and fall
+    back to extending the published JSON otherwise.
+    """
+    use_cache = options.get('cache', True) and price_cache.get_hash(ticker)
+    existing = load_stock_data(ticker) if incremental and not use_cache and not options.get('offline') else None
+    for attempt in range(retries + 1):
         try:
-            data = fetch_stock_data(ticker)
-            output_file = OUTPUT_DIR / f'{ticker}.json'
-            output_file.write_text(json.dumps(data, separators=(',', ':')))
+            if existing:
+                return update_stock_data(ticker, existing, timeout=timeout, **options)
+            return fetch_stock_data(ticker, timeout=timeout, incremental=incremental, **options)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def iter_fetch(
+    tickers: list,
+    workers: int = DEFAULT_WORKERS,
+    bulk: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs,
+):
+    """Fetch tickers concurrently and yield (ticker, data or exception) in order.
+
+    At most `workers` requests are in flight and only a few results are
+    held ahead of the consumer, so memory does not grow with the ticker
+    count. With `bulk`, histories are downloaded `chunk_size` tickers per
+    request, and only the tickers a chunk leaves out are fetched one by
+    one (with retries). The exception is whatever ended a ticker's last
+    attempt.
+    """
+    step = max(1, chunk_size) if bulk else 1
+    window = max(1, workers) * 2
+    options = {key: kwargs[key] for key in ('timeout', 'cache', 'ttl', 'offline', 'incremental') if key in kwargs}
+    pending = deque()
+
+    def result(future: Future):
+        error = future.exception()
+        # Only errors are results; an interrupt in a worker stops the run
+        return error if isinstance(error, Exception) else future.result()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i in range(0, len(tickers), step):
+            chunk = tickers[i:i + step]
+            histories = load_bulk_histories(chunk, chunk_size, **options) if bulk else {}
+            if len(histories) < len(chunk) and bulk:
+                print(f"  {len(chunk) - len(histories)} tickers missing from bulk request, fetching individually")
+
+            for ticker in chunk:
+                if ticker in histories:
+                    future = Future()
+                    future.set_result(history_to_stock_data(ticker, histories.pop(ticker), kwargs.get('stride')))
+                else:
+                    future = pool.submit(fetch_with_retry, ticker, **kwargs)
+                pending.append((ticker, future))
+            while len(pending) > window:
+                ticker, future = pending.popleft()
+                yield ticker, result(future)
 
-            index.append({
-                'ticker': ticker,
-                'name': NAMES.get(ticker, ticker),
-                'dataPoints': len(data['prices']),
-            })
+        while pending:
+            ticker, future = pending.popleft()
+            yield ticker, result(future)
 
-            print(f"  -> {len(data['prices'])} data points saved")
-        except Exception as e:
-            print(f"  -> Error: {e}")
 
+def fetch_all(tickers: list, **kwargs) -> dict:
+    """iter_fetch() collected into a dict, in the same order as `tickers`."""
+    return dict(iter_fetch(tickers, **kwargs))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='max concurrent Yahoo requests (1 = sequential)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='per-request timeout in seconds')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help='retries per ticker after the first attempt')
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF,
+                        help='initial retry delay in seconds, doubled on each retry')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only fetch days after the last cached or published date')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='bypass the local raw-history cache')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL.total_seconds() / 3600,
+                        help='hours before a cached history is refetched')
+    parser.add_argument('--offline', action='store_true',
+                        help='build only from the raw-history cache, never the network')
+    parser.add_argument('--stride', type=int, default=None,
+                        help='sample every Nth day instead of the automatic weekly stride')
+    parser.add_argument('--bulk', action='store_true',
+                        help='download several tickers per request instead of one request per ticker')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='tickers per bulk request')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run, reusing the tickers it already wrote')
+    return parser.parse_args(argv)
+
+
+def read_checkpoint() -> list:
+    """Tickers an interrupted run finished, whose data files are still there."""
+    if not CHECKPOINT_FILE.exists():
+        return []
+    tickers = CHECKPOINT_FILE.read_text().split()
+    return [ticker for ticker in tickers if (OUTPUT_DIR / f'{ticker}.json').exists()]
+
+
+def write_index(state: dict, entries: dict) -> None:
+    index = [entries[ticker] for ticker in TICKERS if ticker in entries]
+    build_state.write_output(state, OUTPUT_DIR / 'index.json', json.dumps(index, indent=2))
+
+
+def write_stock_files(state: dict, data: dict) -> bool:
+    """Write a stock's data, columnar, chart and stats files. Returns True if any changed."""
+    ticker = data['ticker']
+    # Unchanged prices keep the file (and its old 'updated') as is
+    key = build_state.hash_inputs({k: v for k, v in data.items() if k != 'updated'})
+    written = build_state.write_output(state, OUTPUT_DIR / f'{ticker}.json',
+                                       json.dumps(data, separators=(',', ':')), key)
+    for suffix, content in {'col': to_columnar(data), **analytics.stock_files(data)}.items():
+        written |= build_state.write_output(state, OUTPUT_DIR / f'{ticker}.{suffix}.json',
+                                            json.dumps(content, separators=(',', ':')))
+    return written
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Fetch every ticker and write the data files. Returns the analytics summary.
+
+    Tickers stream through one at a time: each is written, analyzed, added
+    to the price store and dropped before the next is taken, so memory
+    stays flat however many tickers there are. Finished tickers are logged
+    to CHECKPOINT_FILE and index.json is rewritten every CHECKPOINT_EVERY
+    tickers, keeping the previous entries for tickers not reached yet;
+    with --resume, an interrupted run reloads the tickers it already wrote
+    instead of fetching them again. Tickers that fail keep their previous
+    summary entry, since their data files are left as they were.
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    done = read_checkpoint() if args.resume else []
+    if not args.resume:
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+    todo = [ticker for ticker in TICKERS if ticker not in set(done)]
+
+    mode = f"bulk requests of {args.chunk_size}" if args.bulk else f"{args.workers} workers"
+    resumed = f" ({len(done)} already done)" if done else ''
+    print(f"Fetching {len(todo)} tickers with {mode}{resumed}...")
+    request_counts.clear()
+    started = time.perf_counter()
+    fetched = iter_fetch(
+        todo,
+        workers=args.workers,
+        bulk=args.bulk,
+        chunk_size=args.chunk_size,
+        retries=0 if args.offline else args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        incremental=args.incremental,
+        cache=args.cache,
+        ttl=timedelta(hours=args.cache_ttl),
+        offline=args.offline,
+        stride=args.stride,
+    )
+    reloaded = ((ticker, load_stock_data(ticker)) for ticker in done)
+
+    state = build_state.load()
     index_file = OUTPUT_DIR / 'index.json'
-    index_file.write_text(json.dumps(index, indent=2))
-    print(f"\nIndex saved with {len(index)} stocks")
+    previous = {entry['ticker']: entry for entry in json.loads(index_file.read_text())} if index_file.exists() else {}
+    entries = {}
+    stocks = {}
+    failed = []
+
+    # The store's date axis covers the history window with a month to spare
+    last_day = int(np.datetime64(datetime.now(), 'D').astype(np.int64))
+    first_day = last_day - HISTORY_YEARS * 365 - 31
+    with price_store.StoreWriter(first_day, last_day) as store, open(CHECKPOINT_FILE, 'a') as checkpoint:
+        for n, (ticker, data) in enumerate(itertools.chain(reloaded, fetched), 1):
+            if isinstance(data, Exception):
+                print(f"  {ticker} -> Error: {data}")
+                failed.append(ticker)
+                continue
+
+            written = write_stock_files(state, data)
+            days, closes = analytics.load_series(data)
+            store.add(ticker, data['name'], days, closes)
+            stocks[ticker] = analytics.analyze(data)
+            entries[ticker] = {'ticker': ticker, 'name': NAMES.get(ticker, ticker), 'dataPoints': len(data['prices'])}
+            checkpoint.write(ticker + '\n')
+            checkpoint.flush()
+            print(f"  {ticker} -> {len(data['prices'])} data points " + ('saved' if written else 'unchanged'))
+
+            if n % CHECKPOINT_EVERY == 0:
+                write_index(state, {**previous, **entries})
+                build_state.save(state)
+                price_cache.flush()
+
+        counts = ', '.join(f"{count} {kind}" for kind, count in sorted(request_counts.items())) or 'none'
+        print(f"Fetched and written in {time.perf_counter() - started:.2f}s, Yahoo requests: {counts}")
+
+        write_index(state, entries)
+        print(f"\nIndex saved with {len(entries)} stocks")
+
+    kept = load_summary(OUTPUT_DIR / 'summary.json').get('stocks', {})
+    stocks.update((ticker, kept[ticker]) for ticker in failed if ticker in kept)
+    summary = analytics.write_summary(stocks, OUTPUT_DIR / 'summary.json', state)
+    print(f"Summary saved for {len(stocks)} stocks")
+    build_state.save(state)
+    price_cache.flush()
+    CHECKPOINT_FILE.unlink()
+    return summary
+
+
+def main(argv=None):
+    run(parse_args(argv))
 
 
 if __name__ == '__main__':
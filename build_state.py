@@ -0,0 +1,165 @@
+"""
+Record of what every generated file was last built from.
+
+build-state.json maps each output path to a hash of its inputs and the date
+that hash last changed. A file found already built, with no entry yet, is
+dated by its last commit instead, or left undated outside git. Writers go
+through write_output(), which leaves the file untouched when the hash
+matches, so an unchanged page or data file is never rewritten and keeps its
+mtime and CDN cache entry. The sitemap reads the change dates back as
+lastmod.
+
+Standard library only: the page and sitemap generators run in the npm
+prebuild, where numpy is not installed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent
+STATE_FILE = PROJECT_ROOT / 'build-state.json'
+STATE_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def load(path: Path = STATE_FILE) -> dict:
+    if not path.exists():
+        return {}
+    state = json.loads(path.read_text())
+    if state.get('version') != STATE_VERSION:
+        return {}
+    return state.get('outputs', {})
+
+
+def save(state: dict, path: Path = STATE_FILE) -> None:
+    with _lock:
+        content = json.dumps({'version': STATE_VERSION, 'outputs': dict(sorted(state.items()))}, indent=2) + '\n'
+    if path.exists() and path.read_text() == content:
+        return
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(content)
+    os.replace(tmp, path)
+
+
+def hash_inputs(*inputs) -> str:
+    """Stable hash of strings, bytes or JSON-serialisable values."""
+    digest = hashlib.sha256()
+    for value in inputs:
+        if isinstance(value, str):
+            value = value.encode()
+        elif not isinstance(value, bytes):
+            value = json.dumps(value, sort_keys=True, separators=(',', ':')).encode()
+        digest.update(len(value).to_bytes(8, 'little'))
+        digest.update(value)
+    return digest.hexdigest()[:32]
+
+
+def output_name(path: Path) -> str:
+    # Outputs are normally built from PROJECT_ROOT, which needs no filesystem lookups
+    try:
+        return path.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        pass
+    try:
+        return path.resolve().relative_to(PROJECT_ROOT.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def committed_on(path: Path) -> str | None:
+    """Date (YYYY-MM-DD) of the last commit touching `path`, or None if it is
+    untracked, modified since, or git is unavailable."""
+    def git(*args) -> str:
+        return subprocess.run(['git', *args, '--', str(path)], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        if git('status', '--porcelain'):
+            return None
+        return git('log', '-1', '--format=%cs') or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def is_current(state: dict, path: Path, key: str) -> bool:
+    """True if `path` exists and was last built from inputs hashing to `key`."""
+    with _lock:
+        entry = state.get(output_name(path))
+    return bool(entry) and entry['hash'] == key and path.exists()
+
+
+def record_output(state: dict, path: Path, key: str) -> None:
+    """Record that `path` was just built from `key`, for writers that produce
+    the file themselves (such as images saved by a renderer)."""
+    with _lock:
+        state[output_name(path)] = {'hash': key, 'changed': date.today().isoformat()}
+
+
+def write_output(state: dict, path: Path, content: str | bytes, key: str | None = None) -> bool:
+    """Write `content` to `path` unless its input hash is unchanged.
+
+    `key` is the hash of whatever the content was built from and defaults to
+    the hash of the content itself; pass one that leaves out volatile fields
+    such as build timestamps. Returns True if the file was written.
+    """
+    key = key or hash_inputs(content)
+    name = output_name(path)
+    with _lock:
+        entry = state.get(name)
+    if entry and entry['hash'] == key and path.exists():
+        return False
+
+    raw = content.encode('utf-8') if isinstance(content, str) else content
+    if not entry and path.exists() and path.read_bytes() == raw:
+        # Already built before there was a state entry: adopt it as is, dated
+        # by when its content was committed (checkout mtimes say nothing)
+        changed = committed_on(path)
+        written = False
+    else:
+        # Written aside and renamed, so an interrupted build never leaves a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(raw)
+        os.replace(tmp, path)
+        changed = date.today().isoformat()
+        written = True
+
+    with _lock:
+        state[name] = {'hash': key, 'changed': changed}
+    return written
+
+
+def replace_output(state: dict, path: Path, tmp: Path, key: str) -> bool:
+    """Move a file already streamed to `tmp` into place, unless `key` is unchanged.
+    For outputs too large to hold in memory. Returns True if `path` was replaced."""
+    name = output_name(path)
+    with _lock:
+        entry = state.get(name)
+    if entry and entry['hash'] == key and path.exists():
+        tmp.unlink()
+        return False
+
+    os.replace(tmp, path)
+    with _lock:
+        state[name] = {'hash': key, 'changed': date.today().isoformat()}
+    return True
+
+
+def forget(state: dict, path: Path) -> None:
+    """Drop a deleted output from the state."""
+    with _lock:
+        state.pop(output_name(path), None)
+
+
+def changed_on(state: dict, path: Path | str) -> str | None:
+    """Date (YYYY-MM-DD) the output at `path` last changed, if it is tracked.
+    A str is taken as the output's name, i.e. its POSIX path relative to the project."""
+    entry = state.get(path if isinstance(path, str) else output_name(path))
+    return entry['changed'] if entry else None
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Write pre-compressed .br and .gz siblings for generated site files.
+
+Static hosting can serve these directly instead of compressing on every
+request, which also lets us use maximum compression levels. Files whose
+content hash matches the manifest from the previous run are skipped, and
+the manifest records original and compressed sizes so payload regressions
+show up in the diff.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip siblings are written without it
+    brotli = None
+
+PROJECT_ROOT = Path(__file__).parent
+PUBLIC_DIR = PROJECT_ROOT / 'public'
+DEFAULT_MANIFEST = PROJECT_ROOT / 'compression-manifest.json'
+COMPRESSIBLE = {'.json', '.html', '.xml', '.txt', '.svg', '.js', '.css'}
+SIBLINGS = ('.gz', '.br')
+
+
+def default_targets() -> list:
+    """Generated data, sitemap index and shards, and robots.txt."""
+    return [PUBLIC_DIR / 'data', *sorted(PUBLIC_DIR.glob('sitemap*.xml')), PUBLIC_DIR / 'robots.txt']
+
+
+def iter_files(targets: list):
+    for target in targets:
+        if target.is_file():
+            yield target
+        elif target.is_dir():
+            yield from sorted(p for p in target.rglob('*') if p.is_file() and p.suffix in COMPRESSIBLE)
+
+
+def compress_gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output byte-stable between runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data: bytes) -> bytes:
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+
+def relative_name(path: Path, base: Path) -> str:
+    try:
+        return path.resolve().relative_to(base.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def compress_file(path: Path) -> dict:
+    data = path.read_bytes()
+    entry = {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+
+    gz = compress_gzip(data)
+    path.with_name(path.name + '.gz').write_bytes(gz)
+    entry['gzip'] = len(gz)
+
+    if brotli is not None:
+        br = compress_brotli(data)
+        path.with_name(path.name + '.br').write_bytes(br)
+        entry['br'] = len(br)
+
+    return entry
+
+
+def is_current(path: Path, entry: dict | None) -> bool:
+    if not entry or entry.get('sha256') != hashlib.sha256(path.read_bytes()).hexdigest():
+        return False
+    wanted = ['.gz'] + (['.br'] if brotli is not None else [])
+    return all(path.with_name(path.name + suffix).exists() for suffix in wanted)
+
+
+def remove_orphans(targets: list) -> int:
+    """Delete .gz/.br siblings whose source file no longer exists."""
+    removed = 0
+    for target in targets:
+        if not target.is_dir():
+            continue
+        for sibling in target.rglob('*'):
+            if sibling.suffix in SIBLINGS and not sibling.with_suffix('').exists():
+                sibling.unlink()
+                removed += 1
+    return removed
+
+
+def compress_assets(targets: list, manifest_path: Path = DEFAULT_MANIFEST) -> dict:
+    base = manifest_path.parent
+    previous = json.loads(manifest_path.read_text()).get('files', {}) if manifest_path.exists() else {}
+
+    files = {}
+    written = 0
+    for path in iter_files(targets):
+        name = relative_name(path, base)
+        if is_current(path, previous.get(name)):
+            files[name] = previous[name]
+            continue
+        files[name] = compress_file(path)
+        written += 1
+
+    totals = {'size': sum(f['size'] for f in files.values()), 'gzip': sum(f['gzip'] for f in files.values())}
+    if brotli is not None:
+        totals['br'] = sum(f.get('br', 0) for f in files.values())
+
+    manifest = {'totals': totals, 'files': dict(sorted(files.items()))}
+    manifest_path.write_text(json.dumps(manifest, indent=2) + '\n')
+
+    removed = remove_orphans(targets)
+    print(f"Compressed {written} files ({len(files) - written} unchanged, {removed} stale siblings removed)")
+    print(f"  {totals['size']:,} bytes -> gzip {totals['gzip']:,}"
+          + (f", brotli {totals['br']:,}" if 'br' in totals else " (install brotli for .br)"))
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', type=Path, help='files or directories (default: generated data, sitemaps, robots)')
+    parser.add_argument('--manifest', type=Path, default=DEFAULT_MANIFEST, help='size manifest to read and update')
+    args = parser.parse_args(argv)
+
+    compress_assets(args.paths or default_targets(), args.manifest)
+
+
+if __name__ == '__main__':
+    main()
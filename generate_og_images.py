@@ -4,23 +4,19 @@ Design matches website: dark bg with emerald radial glows, glass card, logo."""
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-from datetime import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from PIL import Image, ImageDraw, ImageFont
 
-STOCKS = [
-    {"ticker": "NOVO-B.CO", "name": "Novo Nordisk", "slug": "novo-nordisk"},
-    {"ticker": "DSV.CO", "name": "DSV", "slug": "dsv"},
-    {"ticker": "CARL-B.CO", "name": "Carlsberg", "slug": "carlsberg"},
-    {"ticker": "NVDA", "name": "NVIDIA", "slug": "nvidia"},
-    {"ticker": "AAPL", "name": "Apple", "slug": "apple"},
-    {"ticker": "MSFT", "name": "Microsoft", "slug": "microsoft"},
-    {"ticker": "GOOGL", "name": "Google", "slug": "google"},
-    {"ticker": "AMZN", "name": "Amazon", "slug": "amazon"},
-    {"ticker": "NFLX", "name": "Netflix", "slug": "netflix"},
-]
+import build_state
+from stocks import STOCKS, load_summary
 
 WIDTH = 1200
 HEIGHT = 630
@@ -42,34 +38,82 @@ CARD_W, CARD_H = WIDTH - 2 * CARD_MARGIN, HEIGHT - 2 * CARD_MARGIN
 CARD_RADIUS = 20
 
 BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "public" / "data"
 OUTPUT_DIR = BASE_DIR / "public" / "og"
+BASE_CACHE_DIR = BASE_DIR / ".cache" / "og"
+USE_BASE_CACHE = False
+# Directory with *-Regular and *-Bold .ttf/.otf files, so CI and local renders
+# use the same font. Unset, the usual system font locations are probed.
+FONT_DIR = Path(os.environ["OG_FONT_DIR"]) if os.environ.get("OG_FONT_DIR") else None
+SHOW_TIMING = False
 
+# Bump whenever the drawing code changes so every image is re-rendered
+TEMPLATE_VERSION = 1
 
-def load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-    font_paths = [
+
+def render_key(**inputs) -> str:
+    """Hash of everything that affects an image's pixels, recorded in
+    build-state.json so unchanged images are not re-rendered."""
+    payload = json.dumps({"template": TEMPLATE_VERSION, "fonts": font_id(), **inputs}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def format_timing(render_seconds: float, save_seconds: float) -> str:
+    if not SHOW_TIMING:
+        return ""
+    return f"  [render {render_seconds * 1000:.0f} ms, save {save_seconds * 1000:.0f} ms]"
+
+
+def _font_candidates(bold: bool) -> list[str]:
+    if FONT_DIR is not None:
+        pattern = "*-Bold.*tf" if bold else "*-Regular.*tf"
+        return [str(p) for p in sorted(FONT_DIR.glob(pattern))]
+    return [
         "/System/Library/Fonts/Helvetica.ttc",
         "/Library/Fonts/Arial Bold.ttf" if bold else "/Library/Fonts/Arial.ttf",
         "/System/Library/Fonts/SFNSDisplay.ttf",
         "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
     ]
-    for path in font_paths:
+
+
+@lru_cache(maxsize=None)
+def resolve_font(bold: bool) -> tuple[str, int] | None:
+    """Find the first usable font file once per process.
+    Returns: (path, ttc_index), or None to use Pillow's built-in font"""
+    for path in _font_candidates(bold):
         if Path(path).exists():
+            index = (1 if bold else 0) if path.endswith(".ttc") else 0
             try:
-                if path.endswith(".ttc"):
-                    index = 1 if bold else 0
-                    return ImageFont.truetype(path, size, index=index)
-                return ImageFont.truetype(path, size)
+                ImageFont.truetype(path, 12, index=index)
             except (OSError, IndexError):
                 continue
-    return ImageFont.load_default()
+            return path, index
 
+    if FONT_DIR is not None:
+        style = "Bold" if bold else "Regular"
+        raise FileNotFoundError(f"No usable *-{style}.ttf/.otf font in {FONT_DIR}")
+    print(f"  Warning: no {'bold' if bold else 'regular'} TrueType font found, using Pillow's default font")
+    return None
 
-def load_stock_data(ticker: str) -> dict:
-    path = DATA_DIR / f"{ticker}.json"
-    if not path.exists():
-        return {}
-    return json.loads(path.read_text())
+
+def font_id() -> str:
+    """Identifies the fonts in use, so renders with different fonts never share a cache entry."""
+    return "|".join(str(resolve_font(bold)) for bold in (False, True))
+
+
+@lru_cache(maxsize=None)
+def load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    resolved = resolve_font(bold)
+    if resolved is None:
+        return ImageFont.load_default()
+    path, index = resolved
+    return ImageFont.truetype(path, size, index=index)
+
+
+def set_font_dir(font_dir: Path | None) -> None:
+    global FONT_DIR
+    FONT_DIR = font_dir
+    resolve_font.cache_clear()
+    load_font.cache_clear()
 
 
 def format_kr(amount: int) -> str:
@@ -77,46 +121,39 @@ def format_kr(amount: int) -> str:
     return f"{amount:,} kr".replace(',', '.')
 
 
-def calculate_best_return(data: dict) -> tuple[int, str, int]:
-    """Calculate most impressive return period.
+def best_return(analytics: dict | None) -> tuple[int, str, int]:
+    """Headline return from the stock's precomputed `best` period.
     Returns: (final_amount, period_text, years)"""
-    if not data or "prices" not in data or not data["prices"]:
+    if not analytics:
         return 0, "siden start", 0
 
-    prices = data["prices"]
-    latest_price = float(prices[-1]["close"])
-    start_date = datetime.strptime(prices[0]["date"], "%Y-%m-%d")
-    latest_date = datetime.strptime(prices[-1]["date"], "%Y-%m-%d")
-    total_years = (latest_date - start_date).days / 365.25
-
-    start_price = float(prices[0]["close"])
-    total_return = int((latest_price / start_price) * BASE_INVESTMENT)
-
-    ten_year_return = None
-    if total_years >= 10:
-        ten_year_ago = latest_date.replace(year=latest_date.year - 10)
-        for price in prices:
-            price_date = datetime.strptime(price["date"], "%Y-%m-%d")
-            if abs((price_date - ten_year_ago).days) < 180:
-                ten_year_price = float(price["close"])
-                ten_year_return = int((latest_price / ten_year_price) * BASE_INVESTMENT)
-                break
-
-    if ten_year_return and ten_year_return > total_return * 0.7:
-        return ten_year_return, "over 10 år", 10
-    elif total_years >= 15:
-        year = start_date.year
-        return total_return, f"siden {year}", int(total_years)
-    else:
-        years = int(total_years)
-        return total_return, f"over {years} år", years
+    best = analytics["best"]
+    if best["sinceStart"]:
+        return best["finalValue"], f"siden {best['startDate'][:4]}", best["years"]
+    return best["finalValue"], f"over {best['years']} år", best["years"]
+
+
+def region_overlay(left: int, top: int, right: int, bottom: int) -> tuple[Image.Image, tuple[int, int]]:
+    """Transparent RGBA overlay covering only the inclusive box, clipped to the canvas.
+    Returns: (overlay, origin) - draw on the overlay with coordinates minus origin"""
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(WIDTH, right + 1), min(HEIGHT, bottom + 1)
+    return Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0)), (left, top)
+
+
+def composite_region(img: Image.Image, overlay: Image.Image, origin: tuple[int, int]) -> None:
+    """Alpha-composite an overlay onto the RGB image, converting only the region it covers."""
+    x, y = origin
+    region = img.crop((x, y, x + overlay.width, y + overlay.height)).convert("RGBA")
+    region.alpha_composite(overlay)
+    img.paste(region.convert("RGB"), origin)
 
 
 def draw_radial_glow(
     img: Image.Image, cx: int, cy: int, radius: int, color: tuple[int, int, int], max_alpha: int
 ) -> None:
     """Draw a soft radial glow by compositing concentric circles."""
-    overlay = Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 0))
+    overlay, (left, top) = region_overlay(cx - radius, cy - radius, cx + radius, cy + radius)
     draw = ImageDraw.Draw(overlay)
     steps = 20
     for i in range(steps):
@@ -125,12 +162,10 @@ def draw_radial_glow(
         if alpha < 1 or r < 1:
             continue
         draw.ellipse(
-            [cx - r, cy - r, cx + r, cy + r],
+            [cx - r - left, cy - r - top, cx + r - left, cy + r - top],
             fill=(*color, alpha),
         )
-    img_rgba = img.convert("RGBA")
-    img_rgba = Image.alpha_composite(img_rgba, overlay)
-    img.paste(img_rgba.convert("RGB"))
+    composite_region(img, overlay, (left, top))
 
 
 def create_bg_with_atmosphere() -> Image.Image:
@@ -147,26 +182,25 @@ def create_bg_with_atmosphere() -> Image.Image:
 
 def draw_glass_card(img: Image.Image) -> None:
     """Draw a subtle glass-card container matching the website's glass-card class."""
-    overlay = Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 0))
+    overlay, origin = region_overlay(CARD_X, CARD_Y, CARD_X + CARD_W, CARD_Y + CARD_H)
     draw = ImageDraw.Draw(overlay)
+    card_box = [0, 0, CARD_W, CARD_H]
 
     # Card fill: rgba(255,255,255,0.03)
     draw.rounded_rectangle(
-        [CARD_X, CARD_Y, CARD_X + CARD_W, CARD_Y + CARD_H],
+        card_box,
         radius=CARD_RADIUS,
         fill=(255, 255, 255, 8),
     )
     # Card border: rgba(255,255,255,0.08)
     draw.rounded_rectangle(
-        [CARD_X, CARD_Y, CARD_X + CARD_W, CARD_Y + CARD_H],
+        card_box,
         radius=CARD_RADIUS,
         outline=(255, 255, 255, 20),
         width=1,
     )
 
-    img_rgba = img.convert("RGBA")
-    img_rgba = Image.alpha_composite(img_rgba, overlay)
-    img.paste(img_rgba.convert("RGB"))
+    composite_region(img, overlay, origin)
 
 
 def draw_logo(img: Image.Image, x: int, y: int, size: int = 44) -> None:
@@ -201,10 +235,8 @@ def draw_logo(img: Image.Image, x: int, y: int, size: int = 44) -> None:
     # Rotate -10 degrees
     logo = logo.rotate(10, resample=Image.BICUBIC, expand=False, center=(cx, cy))
 
-    # Paste onto main image
-    img_rgba = img.convert("RGBA")
-    img_rgba.paste(logo, (x - canvas_size // 2, y - canvas_size // 2), logo)
-    img.paste(img_rgba.convert("RGB"))
+    # Paste onto main image, using the logo's alpha as mask
+    img.paste(logo, (x - canvas_size // 2, y - canvas_size // 2), logo)
 
 
 def draw_text_with_shadow(
@@ -220,18 +252,18 @@ def draw_text_with_shadow(
     shadow_offset: int = 3,
 ) -> None:
     """Draw text with a subtle colored drop shadow for depth."""
-    overlay = Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 0))
+    # Shadow copies span dx -1..1 and dy 0..2 around the offset text box
+    left, top, right, bottom = draw.textbbox((pos[0], pos[1] + shadow_offset), text, font=font, anchor=anchor)
+    overlay, (ox, oy) = region_overlay(left - 2, top - 1, right + 2, bottom + 3)
     od = ImageDraw.Draw(overlay)
     # Shadow (multiple offset copies for softness)
     for dx in range(-1, 2):
         for dy in range(0, 3):
             od.text(
-                (pos[0] + dx, pos[1] + shadow_offset + dy),
+                (pos[0] + dx - ox, pos[1] + shadow_offset + dy - oy),
                 text, fill=(*shadow_color, shadow_alpha // 2), font=font, anchor=anchor,
             )
-    img_rgba = img.convert("RGBA")
-    img_rgba = Image.alpha_composite(img_rgba, overlay)
-    img.paste(img_rgba.convert("RGB"))
+    composite_region(img, overlay, (ox, oy))
     # Sharp text on top
     draw.text(pos, text, fill=fill, font=font, anchor=anchor)
 
@@ -252,36 +284,33 @@ def draw_cta_pill(img: Image.Image, cx: int, cy: int, text: str) -> None:
     pill_y = cy - pill_h // 2
 
     # Semi-transparent emerald background
-    overlay = Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 0))
+    overlay, origin = region_overlay(pill_x, pill_y, pill_x + pill_w, pill_y + pill_h)
     od = ImageDraw.Draw(overlay)
     od.rounded_rectangle(
-        [pill_x, pill_y, pill_x + pill_w, pill_y + pill_h],
+        [pill_x - origin[0], pill_y - origin[1], pill_x + pill_w - origin[0], pill_y + pill_h - origin[1]],
         radius=pill_h // 2,
         fill=(*EMERALD, 50),
         outline=(*EMERALD, 100),
         width=1,
     )
-    img_rgba = img.convert("RGBA")
-    img_rgba = Image.alpha_composite(img_rgba, overlay)
-    img.paste(img_rgba.convert("RGB"))
+    composite_region(img, overlay, origin)
 
     # Text on top
     draw = ImageDraw.Draw(img)
     draw.text((cx, cy), text, fill=EMERALD_LIGHT, font=font, anchor="mm")
 
 
-def generate_stock_image(stock: dict) -> None:
-    ticker = stock["ticker"]
-    name = stock["name"]
-    slug = stock["slug"]
-
-    data = load_stock_data(ticker)
-    final_amount, period_text, years = calculate_best_return(data)
+@lru_cache(maxsize=None)
+def _render_base_layer(template_version: int, fonts: str, cache_dir: Path | None) -> Image.Image:
+    fonts_hash = hashlib.sha256(fonts.encode()).hexdigest()[:8]
+    path = cache_dir / f"base-v{template_version}-{fonts_hash}.png" if cache_dir else None
+    if path and path.exists():
+        with Image.open(path) as cached:
+            return cached.convert("RGB")
 
     # Build image layers
     img = create_bg_with_atmosphere()
     draw_glass_card(img)
-    draw = ImageDraw.Draw(img)
 
     # Logo + brand in top-left of card
     logo_x = CARD_X + 52
@@ -292,6 +321,26 @@ def generate_stock_image(stock: dict) -> None:
     font_brand = load_font(22, bold=False)
     draw.text((logo_x + 30, logo_y), "tiderpenge.dk", fill=GRAY_LIGHT, font=font_brand, anchor="lm")
 
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        img.save(path, "PNG")
+    return img
+
+
+def base_layer() -> Image.Image:
+    """Copy of the background, glass card, logo and brand shared by every image.
+
+    Rendered once per process (and template version and fonts), and read from
+    BASE_CACHE_DIR instead when disk caching is enabled.
+    """
+    return _render_base_layer(TEMPLATE_VERSION, font_id(), BASE_CACHE_DIR if USE_BASE_CACHE else None).copy()
+
+
+def render_stock_image(name: str, final_amount: int, period_text: str) -> Image.Image:
+    # Static background, card and brand come from the cached base layer
+    img = base_layer()
+    draw = ImageDraw.Draw(img)
+
     # Fonts
     font_name = load_font(64, bold=True)
     font_sub = load_font(44, bold=False)
@@ -323,27 +372,73 @@ def generate_stock_image(stock: dict) -> None:
     # CTA pill at bottom of card
     draw_cta_pill(img, center_x, CARD_Y + CARD_H - 55, "Beregn dit afkast")
 
-    # Save
-    out_path = OUTPUT_DIR / f"{slug}.png"
+    return img
+
+
+def save_stock_image(job: tuple[str, int, str, Path]) -> tuple[float, float]:
+    """Render and save one image. Top-level so process pool workers can run it.
+    Returns: (render_seconds, save_seconds)"""
+    name, final_amount, period_text, out_path = job
+    started = time.perf_counter()
+    img = render_stock_image(name, final_amount, period_text)
+    rendered = time.perf_counter()
     img.save(out_path, "PNG", optimize=True)
-    print(f"  {name}: {final_text} {period_text}")
+    return rendered - started, time.perf_counter() - rendered
 
 
-def generate_homepage_image() -> None:
+def _init_worker(use_base_cache: bool, font_dir: Path | None) -> None:
+    global USE_BASE_CACHE
+    USE_BASE_CACHE = use_base_cache
+    set_font_dir(font_dir)
+
+
+def render_images(jobs: list[tuple[str, int, str, Path]], workers: int = 1) -> list[tuple[float, float]]:
+    """Render jobs serially or across a process pool, returning timings in job order.
+    Every image is rendered the same way either way, so the PNGs are byte-identical."""
+    if workers <= 1 or len(jobs) <= 1:
+        return [save_stock_image(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(USE_BASE_CACHE, FONT_DIR)) as pool:
+        return list(pool.map(save_stock_image, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def generate_stock_images(stocks: list[dict], summary: dict, state: dict,
+                          force: bool = False, workers: int = 1) -> None:
+    stock_analytics = summary.get("stocks", {})
+    jobs = []
+    keys = []
+    for stock in stocks:
+        name = stock["name"]
+        slug = stock["slug"]
+
+        final_amount, period_text, years = best_return(stock_analytics.get(stock["ticker"]))
+
+        out_path = OUTPUT_DIR / f"{slug}.png"
+        key = render_key(name=name, final_amount=final_amount, period_text=period_text)
+        if not force and build_state.is_current(state, out_path, key):
+            print(f"  {name}: unchanged")
+            continue
+        jobs.append((name, final_amount, period_text, out_path))
+        keys.append(key)
+
+    timings = render_images(jobs, workers)
+    for (name, final_amount, period_text, out_path), key, timing in zip(jobs, keys, timings):
+        build_state.record_output(state, out_path, key)
+        print(f"  {name}: {format_kr(final_amount)} {period_text}{format_timing(*timing)}")
+
+
+def generate_homepage_image(state: dict, force: bool = False) -> None:
     """Generate generic OG image for homepage."""
-    img = create_bg_with_atmosphere()
-    draw_glass_card(img)
-    draw = ImageDraw.Draw(img)
+    out_path = BASE_DIR / "public" / "og-image.png"
+    key = render_key(name="homepage")
+    if not force and build_state.is_current(state, out_path, key):
+        print("  Homepage: unchanged")
+        return
 
-    # Logo + brand in top-left of card
-    logo_x = CARD_X + 52
-    logo_y = CARD_Y + 48
-    draw_logo(img, logo_x, logo_y, size=40)
+    started = time.perf_counter()
+    img = base_layer()
     draw = ImageDraw.Draw(img)
 
-    font_brand = load_font(22, bold=False)
-    draw.text((logo_x + 30, logo_y), "tiderpenge.dk", fill=GRAY_LIGHT, font=font_brand, anchor="lm")
-
     font_huge = load_font(80, bold=True)
     font_large = load_font(48, bold=False)
     font_medium = load_font(36, bold=False)
@@ -376,22 +471,54 @@ def generate_homepage_image() -> None:
     draw_cta_pill(img, center_x, CARD_Y + CARD_H - 55, "Beregn dit afkast")
 
     # Save
-    out_path = BASE_DIR / "public" / "og-image.png"
+    rendered = time.perf_counter()
     img.save(out_path, "PNG", optimize=True)
-    print(f"  Homepage: {out_path.name}")
+    build_state.record_output(state, out_path, key)
+    timing = format_timing(rendered - started, time.perf_counter() - rendered)
+    print(f"  Homepage: {out_path.name}{timing}")
 
 
-def main() -> None:
+def run(summary: dict | None = None, force: bool = False, workers: int = 1) -> None:
+    """Render every stock image and the homepage image. `summary` defaults to public/data/summary.json."""
+    if summary is None:
+        summary = load_summary()
+
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     print("Generating OG images...\n")
 
-    for stock in STOCKS:
-        generate_stock_image(stock)
+    state = build_state.load()
+    generate_stock_images(STOCKS, summary, state, force=force, workers=workers)
 
     print()
-    generate_homepage_image()
+    generate_homepage_image(state, force=force)
+    build_state.save(state)
     print("\nDone!")
 
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate OG share images.")
+    parser.add_argument("--force", action="store_true", help="re-render images even if their inputs are unchanged")
+    parser.add_argument("--cache-base", action="store_true", help="keep the rendered base layer on disk between runs")
+    parser.add_argument("--timing", action="store_true", help="print render and save time per image")
+    parser.add_argument("--font-dir", type=Path, default=FONT_DIR,
+                        help="directory with *-Regular/*-Bold .ttf files (default: $OG_FONT_DIR or system fonts)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="render processes (default: CPU count, 1 = serial)")
+    return parser
+
+
+def configure(args: argparse.Namespace) -> None:
+    global USE_BASE_CACHE, SHOW_TIMING
+    USE_BASE_CACHE = args.cache_base
+    SHOW_TIMING = args.timing
+    set_font_dir(args.font_dir)
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    configure(args)
+    run(force=args.force, workers=args.workers)
+
+
 if __name__ == "__main__":
     main()
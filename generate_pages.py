@@ -4,64 +4,29 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from textwrap import dedent
 
+import build_state
+from stocks import STOCKS, load_summary
+
 PROJECT_ROOT = Path(__file__).parent
 DOMAIN = "https://tiderpenge.dk"
+# Page writes are mostly filesystem calls, which release the GIL
+WRITE_WORKERS = min(8, os.cpu_count() or 1)
 
-STOCKS = [
-    {"ticker": "NOVO-B.CO", "name": "Novo Nordisk", "slug": "novo-nordisk"},
-    {"ticker": "DSV.CO", "name": "DSV", "slug": "dsv"},
-    {"ticker": "CARL-B.CO", "name": "Carlsberg", "slug": "carlsberg"},
-    {"ticker": "NVDA", "name": "NVIDIA", "slug": "nvidia"},
-    {"ticker": "AAPL", "name": "Apple", "slug": "apple"},
-    {"ticker": "MSFT", "name": "Microsoft", "slug": "microsoft"},
-    {"ticker": "GOOGL", "name": "Google", "slug": "google"},
-    {"ticker": "AMZN", "name": "Amazon", "slug": "amazon"},
-    {"ticker": "NFLX", "name": "Netflix", "slug": "netflix"},
-]
-
-
-def get_year_range(ticker: str) -> tuple[str, str]:
-    """Read stock data JSON and return (first_year, last_year)."""
-    data_file = PROJECT_ROOT / "public" / "data" / f"{ticker}.json"
-    if not data_file.exists():
-        return ("2001", "2026")
-    data = json.loads(data_file.read_text(encoding="utf-8"))
-    prices = data.get("prices", [])
-    if not prices:
+
+def get_year_range(ticker: str, summary: dict) -> tuple[str, str]:
+    """Return (first_year, last_year) of the stock's data from the summary."""
+    stock = summary.get("stocks", {}).get(ticker)
+    if not stock:
         return ("2001", "2026")
-    return prices[0]["date"][:4], prices[-1]["date"][:4]
+    return stock["firstDate"][:4], stock["lastDate"][:4]
 
 
-def head(
-    *,
-    title: str,
-    description: str,
-    canonical: str,
-    og_title: str | None = None,
-    og_description: str | None = None,
-    og_image: str | None = None,
-    json_ld: str | None = None,
-) -> str:
-    og_t = og_title or title
-    og_d = og_description or description
-    og_img_tag = (
-        f'    <meta property="og:image" content="{og_image}">'
-        if og_image
-        else ""
-    )
-    json_ld_block = (
-        dedent(f"""\
-    <script type="application/ld+json">
-    {json_ld}
-    </script>""")
-        if json_ld
-        else ""
-    )
-
-    return dedent(f"""\
+HEAD_TEMPLATE = """\
 <!DOCTYPE html>
 <html lang="da">
 <head>
@@ -72,11 +37,11 @@ def head(
     <link rel="canonical" href="{canonical}">
 
     <!-- Open Graph -->
-    <meta property="og:title" content="{og_t}">
-    <meta property="og:description" content="{og_d}">
+    <meta property="og:title" content="{og_title}">
+    <meta property="og:description" content="{og_description}">
     <meta property="og:type" content="website">
     <meta property="og:url" content="{canonical}">
-{og_img_tag}
+{og_image_tag}
 
     <!-- Twitter -->
     <meta name="twitter:card" content="summary_large_image">
@@ -92,18 +57,20 @@ def head(
     <!-- Analytics -->
     <script defer data-domain="tiderpenge.dk" src="https://plausible.io/js/script.js"></script>
 {json_ld_block}
-</head>""")
+</head>"""
 
+OG_IMAGE_TEMPLATE = '    <meta property="og:image" content="{og_image}">'
+JSON_LD_TEMPLATE = """\
+    <script type="application/ld+json">
+    {json_ld}
+    </script>"""
 
-def page_header() -> str:
-    return dedent("""\
+PAGE_HEADER = dedent("""\
     <header class="text-center mb-8 sm:mb-12">
       <a href="/" aria-label="Hjem"><img src="/assets/logo.svg" alt="Tid er Penge" class="h-16 sm:h-20 mx-auto mb-6"></a>
     </header>""")
 
-
-def footer() -> str:
-    return dedent("""\
+FOOTER = dedent("""\
     <footer class="text-center text-sm mt-16 pt-8 border-t border-white/5">
       <nav class="flex justify-center gap-6 mb-6 text-xs">
         <a href="/" class="text-gray-500 hover:text-emerald-400 transition-colors">Hjem</a>
@@ -114,28 +81,88 @@ def footer() -> str:
       <p class="text-gray-600 mt-2">Aktiedata opdateres ugentligt.</p>
     </footer>""")
 
-
-def body_wrap(inner: str, script: str) -> str:
-    return dedent(f"""\
+# Split at the page content and script so body_wrap() only concatenates
+BODY_START, BODY_MIDDLE, BODY_END = f"""\
 <body class="min-h-screen min-h-dvh bg-dark-gradient font-sans antialiased text-gray-100">
   <div class="progress-bar" id="progress-bar"><div class="progress-fill" id="progress-fill"></div></div>
   <div class="mx-auto max-w-2xl lg:max-w-3xl px-4 pt-6 pb-8 sm:pt-12 sm:pb-16 safe-area-padding">
-{page_header()}
+{PAGE_HEADER}
 
-{inner}
+\0
 
-{footer()}
+{FOOTER}
   </div>
-  <script type="module" src="{script}"></script>
+  <script type="module" src="\0"></script>
 </body>
-</html>""")
+</html>""".split("\0")
+
+STOCK_TEMPLATE = dedent("""\
+    <!-- Hero -->
+    <div class="text-center mb-8">
+      <h1 class="text-3xl sm:text-4xl font-bold mb-3"><span class="gradient-text">Hvad hvis du havde investeret i {name}?</span></h1>
+      <p class="text-gray-400 text-lg">Se hvad dine penge kunne v\u00e6re vokset til</p>
+    </div>
+
+    <!-- Stats Grid (rendered by JS) -->
+    <div id="stock-stats" class="mb-8"></div>
+
+    <!-- Embedded Calculator -->
+    <main class="journey-container glass-card rounded-3xl p-6 sm:p-8 mb-8 glow-hover" id="journey-container" data-ticker="{ticker}">
+    </main>
+
+    <!-- Cross-links -->
+    <div class="cross-links">
+      <p class="cross-links-title">Se andre aktier</p>
+      <div class="cross-links-grid">
+    {cross_links}
+        <a href="/aktier/" class="cross-link cross-link-all">Se alle aktier \u2192</a>
+      </div>
+    </div>""")
+
+CROSS_LINK_TEMPLATE = '    <a href="/aktier/{slug}/" class="cross-link">Sammenlign med {name}</a>'
+CROSS_LINKS = 4
+
+
+def head(
+    *,
+    title: str,
+    description: str,
+    canonical: str,
+    og_title: str | None = None,
+    og_description: str | None = None,
+    og_image: str | None = None,
+    json_ld: str | None = None,
+) -> str:
+    return HEAD_TEMPLATE.format(
+        title=title,
+        description=description,
+        canonical=canonical,
+        og_title=og_title or title,
+        og_description=og_description or description,
+        og_image_tag=OG_IMAGE_TEMPLATE.format(og_image=og_image) if og_image else "",
+        json_ld_block=JSON_LD_TEMPLATE.format(json_ld=json_ld) if json_ld else "",
+    )
 
 
-def generate_stock_page(stock: dict[str, str]) -> str:
+def body_wrap(inner: str, script: str) -> str:
+    return BODY_START + inner + BODY_MIDDLE + script + BODY_END
+
+
+def cross_link_map(stocks: list[dict[str, str]], count: int = CROSS_LINKS) -> dict[str, list[dict[str, str]]]:
+    """Stocks each page links to: the next `count` around a ring ordered by
+    ticker hash. One sort for the whole site, a stable but varied mix per
+    page, and every stock is linked from the same number of pages."""
+    ring = sorted(stocks, key=lambda s: hashlib.md5(s["ticker"].encode()).hexdigest())
+    n = len(ring)
+    count = min(count, n - 1)
+    return {s["ticker"]: [ring[(i + j) % n] for j in range(1, count + 1)] for i, s in enumerate(ring)}
+
+
+def generate_stock_page(stock: dict[str, str], summary: dict, links: list[dict[str, str]]) -> str:
     ticker = stock["ticker"]
     name = stock["name"]
     slug = stock["slug"]
-    first_year, last_year = get_year_range(ticker)
+    first_year, last_year = get_year_range(ticker, summary)
 
     title = f"Hvad hvis du havde investeret i {name}? ({first_year}-{last_year}) | Tid er Penge"
     og_title = f"Hvad hvis du havde investeret i {name}? ({first_year}-{last_year})"
@@ -156,38 +183,8 @@ def generate_stock_page(stock: dict[str, str]) -> str:
         ensure_ascii=False,
     )
 
-    # Build cross-links — hash-based rotation so each page gets a diverse mix
-    other_stocks = sorted(
-        [s for s in STOCKS if s["ticker"] != ticker],
-        key=lambda s: hashlib.md5(f"{ticker}-{s['ticker']}".encode()).hexdigest(),
-    )[:4]
-    cross_links = "\n".join(
-        f'        <a href="/aktier/{s["slug"]}/" class="cross-link">Sammenlign med {s["name"]}</a>'
-        for s in other_stocks
-    )
-
-    inner = dedent(f"""\
-    <!-- Hero -->
-    <div class="text-center mb-8">
-      <h1 class="text-3xl sm:text-4xl font-bold mb-3"><span class="gradient-text">Hvad hvis du havde investeret i {name}?</span></h1>
-      <p class="text-gray-400 text-lg">Se hvad dine penge kunne v\u00e6re vokset til</p>
-    </div>
-
-    <!-- Stats Grid (rendered by JS) -->
-    <div id="stock-stats" class="mb-8"></div>
-
-    <!-- Embedded Calculator -->
-    <main class="journey-container glass-card rounded-3xl p-6 sm:p-8 mb-8 glow-hover" id="journey-container" data-ticker="{ticker}">
-    </main>
-
-    <!-- Cross-links -->
-    <div class="cross-links">
-      <p class="cross-links-title">Se andre aktier</p>
-      <div class="cross-links-grid">
-{cross_links}
-        <a href="/aktier/" class="cross-link cross-link-all">Se alle aktier \u2192</a>
-      </div>
-    </div>""")
+    cross_links = "\n".join(CROSS_LINK_TEMPLATE.format(slug=s["slug"], name=s["name"]) for s in links)
+    inner = STOCK_TEMPLATE.format(name=name, ticker=ticker, cross_links=cross_links)
 
     return (
         head(
@@ -204,31 +201,27 @@ def generate_stock_page(stock: dict[str, str]) -> str:
     )
 
 
-def generate_overview_page() -> str:
-    title = "Hvilken aktie ville have givet dig mest? | Tid er Penge"
-    description = "Sammenlign historiske afkast for 9 popul\u00e6re aktier. Find ud af hvilken investering der ville have gjort dig rigest."
-    canonical = f"{DOMAIN}/aktier/"
-
-    inner = dedent("""\
+OVERVIEW_INNER = dedent("""\
     <div class="text-center mb-8">
       <h1 class="text-3xl sm:text-4xl font-bold mb-3"><span class="gradient-text">Hvilken aktie ville have givet dig mest?</span></h1>
       <p class="text-gray-400 text-lg">Sammenlign historiske afkast</p>
     </div>
     <main id="overview-grid" class="mb-8"></main>""")
 
+
+def generate_overview_page() -> str:
+    title = "Hvilken aktie ville have givet dig mest? | Tid er Penge"
+    description = f"Sammenlign historiske afkast for {len(STOCKS)} popul\u00e6re aktier. Find ud af hvilken investering der ville have gjort dig rigest."
+    canonical = f"{DOMAIN}/aktier/"
+
     return (
         head(title=title, description=description, canonical=canonical)
         + "\n"
-        + body_wrap(inner, "/src/pages/overview.ts")
+        + body_wrap(OVERVIEW_INNER, "/src/pages/overview.ts")
     )
 
 
-def generate_about_page() -> str:
-    title = "Om Tid er Penge"
-    description = "L\u00e6r mere om tiderpenge.dk - den gratis investeringsberegner der viser hvad tid g\u00f8r ved dine penge."
-    canonical = f"{DOMAIN}/om/"
-
-    inner = dedent("""\
+ABOUT_INNER = dedent("""\
     <main class="glass-card rounded-3xl p-6 sm:p-8 mb-8">
       <h1 class="text-2xl sm:text-3xl font-bold mb-6"><span class="gradient-text">Om Tid er Penge</span></h1>
 
@@ -255,39 +248,76 @@ def generate_about_page() -> str:
       </div>
     </main>""")
 
+
+def generate_about_page() -> str:
+    title = "Om Tid er Penge"
+    description = "L\u00e6r mere om tiderpenge.dk - den gratis investeringsberegner der viser hvad tid g\u00f8r ved dine penge."
+    canonical = f"{DOMAIN}/om/"
+
     return (
         head(title=title, description=description, canonical=canonical)
         + "\n"
-        + body_wrap(inner, "/src/pages/about.ts")
+        + body_wrap(ABOUT_INNER, "/src/pages/about.ts")
     )
 
 
-def write_page(path: Path, html: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(html, encoding="utf-8")
-    print(f"  {path.relative_to(PROJECT_ROOT)}")
+def print_written(path: Path, written: bool) -> None:
+    print(f"  {path.relative_to(PROJECT_ROOT)}" + ("" if written else " (unchanged)"))
 
 
-def main() -> None:
+def write_page(path: Path, html: str, state: dict) -> None:
+    print_written(path, build_state.write_output(state, path, html))
+
+
+def write_stock_pages(
+    stocks: list[dict[str, str]],
+    summary: dict,
+    state: dict,
+    root: Path = PROJECT_ROOT,
+    workers: int = WRITE_WORKERS,
+) -> list[tuple[Path, bool]]:
+    """Render and write every stock page. Returns (path, written) in stock order."""
+    links = cross_link_map(stocks)
+
+    def write(stock: dict[str, str]) -> tuple[Path, bool]:
+        path = root / "aktier" / stock["slug"] / "index.html"
+        html = generate_stock_page(stock, summary, links[stock["ticker"]])
+        return path, build_state.write_output(state, path, html)
+
+    if workers <= 1:
+        return [write(stock) for stock in stocks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(write, stocks))
+
+
+def run(summary: dict | None = None) -> None:
+    """Write every page. `summary` defaults to public/data/summary.json."""
+    if summary is None:
+        summary = load_summary()
+    state = build_state.load()
     print("Generating pages for tiderpenge.dk\n")
 
     # Stock pages
     print("Stock pages:")
-    for stock in STOCKS:
-        out = PROJECT_ROOT / "aktier" / stock["slug"] / "index.html"
-        write_page(out, generate_stock_page(stock))
+    for path, written in write_stock_pages(STOCKS, summary, state):
+        print_written(path, written)
 
     # Overview page
     print("\nOverview page:")
-    write_page(PROJECT_ROOT / "aktier" / "index.html", generate_overview_page())
+    write_page(PROJECT_ROOT / "aktier" / "index.html", generate_overview_page(), state)
 
     # About page
     print("\nAbout page:")
-    write_page(PROJECT_ROOT / "om" / "index.html", generate_about_page())
+    write_page(PROJECT_ROOT / "om" / "index.html", generate_about_page(), state)
 
+    build_state.save(state)
     total = len(STOCKS) + 2
     print(f"\nDone — {total} pages generated.")
 
 
+def main() -> None:
+    run()
+
+
 if __name__ == "__main__":
     main()
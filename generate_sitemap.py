@@ -1,19 +1,38 @@
-"""Generate sitemap.xml and robots.txt for tiderpenge.dk."""
+"""Generate sitemap.xml and robots.txt for tiderpenge.dk.
 
+URLs are streamed into sitemap-N.xml shards of at most 50,000 URLs / 50 MB
+(the protocol limits), and sitemap.xml is the index pointing at them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+from collections.abc import Iterator
 from datetime import date
 from pathlib import Path
 
+import build_state
+from stocks import STOCKS, load_summary
+
+PROJECT_ROOT = Path(__file__).parent
 DOMAIN = "https://tiderpenge.dk"
-SLUGS = [
-    "novo-nordisk", "dsv", "carlsberg",
-    "nvidia", "apple", "microsoft",
-    "google", "amazon", "netflix",
-]
+DATA_DIR = PROJECT_ROOT / "public" / "data"
+DATA_NAME = build_state.output_name(DATA_DIR)
 
+SHARD_URLS = 50_000
+SHARD_BYTES = 50 * 1024 * 1024
+URLSET_START = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+"""
+URLSET_END = "</urlset>\n"
+
+# (path, priority, changefreq, generated page, shows data from every stock)
 STATIC_URLS = [
-    ("/", "1.0", "weekly"),
-    ("/aktier/", "0.8", "weekly"),
-    ("/om/", "0.5", "monthly"),
+    ("/", "1.0", "weekly", None, True),
+    ("/aktier/", "0.8", "weekly", "aktier/index.html", True),
+    ("/om/", "0.5", "monthly", "om/index.html", False),
 ]
 
 
@@ -26,43 +45,157 @@ def build_url_entry(loc: str, priority: str, changefreq: str, lastmod: str) -> s
   </url>"""
 
 
-def generate_sitemap(output_dir: Path) -> None:
-    today = date.today().isoformat()
+def last_changed(state: dict, paths: list[str], default: str) -> str:
+    """Latest date any of the outputs changed, per the build state."""
+    dates = [d for d in (build_state.changed_on(state, path) for path in paths) if d]
+    return max(dates, default=default)
 
-    entries = [
-        build_url_entry(f"{DOMAIN}{path}", priority, changefreq, today)
-        for path, priority, changefreq in STATIC_URLS
-    ]
-    entries.extend(
-        build_url_entry(f"{DOMAIN}/aktier/{slug}/", "0.7", "weekly", today)
-        for slug in SLUGS
-    )
 
-    sitemap = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{chr(10).join(entries)}
-</urlset>
+def iter_urls(summary: dict, state: dict) -> Iterator[tuple[str, str, str, str]]:
+    """(loc, priority, changefreq, lastmod) for every page in the stock registry."""
+    today = date.today().isoformat()
+    # Date of each ticker's latest price, for outputs not yet in the build state
+    last_dates = {ticker: stock["lastDate"] for ticker, stock in summary.get("stocks", {}).items()}
+    # Output names as build_state records them; plain strings keep this cheap for large registries
+    data_files = [f"{DATA_NAME}/{ticker}.json" for ticker in last_dates]
+
+    for path, priority, changefreq, page, has_data in STATIC_URLS:
+        sources = ([page] if page else []) + (data_files if has_data else [])
+        default = max(last_dates.values(), default=today) if has_data else today
+        yield f"{DOMAIN}{path}", priority, changefreq, last_changed(state, sources, default)
+    for stock in STOCKS:
+        sources = [f"aktier/{stock['slug']}/index.html", f"{DATA_NAME}/{stock['ticker']}.json"]
+        lastmod = last_changed(state, sources, last_dates.get(stock["ticker"], today))
+        yield f"{DOMAIN}/aktier/{stock['slug']}/", "0.7", "weekly", lastmod
+
+
+def write_shards(
+    urls: Iterator[tuple[str, str, str, str]],
+    output_dir: Path,
+    state: dict,
+    compress: bool = False,
+    max_urls: int = SHARD_URLS,
+    max_bytes: int = SHARD_BYTES,
+) -> list[tuple[str, str, int]]:
+    """Stream URL entries into sitemap-N.xml(.gz) shards without holding more
+    than one entry in memory. Unchanged shards are left untouched.
+    Returns: (file name, latest lastmod, URL count) per shard"""
+    shards = []
+    suffix = ".xml.gz" if compress else ".xml"
+    out = None
+
+    def start() -> None:
+        nonlocal out, raw, tmp, path, digest, size, count, lastmod
+        path = output_dir / f"sitemap-{len(shards) + 1}{suffix}"
+        tmp = path.with_name(path.name + ".tmp")
+        raw = tmp.open("wb")
+        # mtime=0 keeps gzipped shards byte-stable between runs
+        out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) if compress else raw
+        digest, size, count, lastmod = hashlib.sha256(), 0, 0, ""
+        emit(URLSET_START.encode())
+
+    def emit(data: bytes) -> None:
+        nonlocal size
+        out.write(data)
+        digest.update(data)
+        size += len(data)
+
+    def finish() -> None:
+        emit(URLSET_END.encode())
+        out.close()
+        raw.close()
+        written = build_state.replace_output(state, path, tmp, digest.hexdigest()[:32])
+        if written and not compress:
+            # Pre-compressed siblings (compress_assets.py) are stale now
+            for sibling in (path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")):
+                sibling.unlink(missing_ok=True)
+                build_state.forget(state, sibling)
+        shards.append((path.name, lastmod, count))
+        print(f"{'Generated' if written else 'Unchanged'} {path} ({count} URLs)")
+
+    raw = tmp = path = digest = None
+    size = count = 0
+    lastmod = ""
+    for loc, priority, changefreq, url_lastmod in urls:
+        data = (build_url_entry(loc, priority, changefreq, url_lastmod) + "\n").encode()
+        if out is not None and (count >= max_urls or size + len(data) + len(URLSET_END) > max_bytes):
+            finish()
+            out = None
+        if out is None:
+            start()
+        emit(data)
+        count += 1
+        lastmod = max(lastmod, url_lastmod)
+    if out is not None:
+        finish()
+    return shards
+
+
+def remove_stale_shards(output_dir: Path, shards: list[tuple[str, str, int]], state: dict) -> None:
+    """Delete shards (and their .gz/.br siblings) left over from a larger or differently compressed run."""
+    names = {name for name, _, _ in shards}
+    for path in output_dir.glob("sitemap-*.xml*"):
+        base = path.with_suffix("") if path.suffix in (".gz", ".br") else path
+        if path.name in names or (base.name in names and base.suffix == ".xml"):
+            continue
+        path.unlink()
+        build_state.forget(state, path)
+
+
+def generate_sitemap(output_dir: Path, summary: dict, state: dict, compress: bool = False,
+                     max_urls: int = SHARD_URLS) -> None:
+    shards = write_shards(iter_urls(summary, state), output_dir, state, compress=compress, max_urls=max_urls)
+    remove_stale_shards(output_dir, shards, state)
+
+    entries = "".join(
+        f"""  <sitemap>
+    <loc>{DOMAIN}/{name}</loc>
+    <lastmod>{lastmod}</lastmod>
+  </sitemap>
+"""
+        for name, lastmod, _ in shards
+    )
+    index = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{entries}</sitemapindex>
 """
 
     path = output_dir / "sitemap.xml"
-    path.write_text(sitemap)
-    print(f"Generated {path} ({len(entries)} URLs)")
+    written = build_state.write_output(state, path, index)
+    total = sum(count for _, _, count in shards)
+    print(f"{'Generated' if written else 'Unchanged'} {path} ({len(shards)} shards, {total} URLs)")
 
 
-def generate_robots(output_dir: Path) -> None:
+def generate_robots(output_dir: Path, state: dict) -> None:
     content = f"""User-agent: *
 Allow: /
 
 Sitemap: {DOMAIN}/sitemap.xml
 """
     path = output_dir / "robots.txt"
-    path.write_text(content)
-    print(f"Generated {path}")
+    written = build_state.write_output(state, path, content)
+    print(f"{'Generated' if written else 'Unchanged'} {path}")
 
 
-if __name__ == "__main__":
-    output_dir = Path(__file__).parent / "public"
+def run(summary: dict | None = None, compress: bool = False, max_urls: int = SHARD_URLS) -> None:
+    """Write the sitemap and robots.txt. `summary` defaults to public/data/summary.json."""
+    output_dir = PROJECT_ROOT / "public"
     output_dir.mkdir(exist_ok=True)
+    state = build_state.load()
 
-    generate_sitemap(output_dir)
-    generate_robots(output_dir)
+    generate_sitemap(output_dir, load_summary() if summary is None else summary, state,
+                     compress=compress, max_urls=max_urls)
+    generate_robots(output_dir, state)
+    build_state.save(state)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the sitemap index, shards and robots.txt.")
+    parser.add_argument("--gzip", action="store_true", help="write shards as sitemap-N.xml.gz")
+    parser.add_argument("--shard-urls", type=int, default=SHARD_URLS, help="max URLs per shard")
+    args = parser.parse_args()
+    run(compress=args.gzip, max_urls=args.shard_urls)
+
+
+if __name__ == "__main__":
+    main()
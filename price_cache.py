@@ -0,0 +1,167 @@
+"""
+Local on-disk cache of raw daily OHLCV history from yfinance.
+
+Frames are stored content-addressed as .npz files named by a hash of their
+data, with refs.json mapping each ticker to its current object and fetch
+time. A ticker's hash only changes when its history does, so downstream
+steps can compare hashes to decide whether anything needs rebuilding.
+
+refs.json is read once per process and kept in memory: save() only
+updates that copy, and flush() (at checkpoints, and on exit) writes it
+back and deletes the objects no ticker points to any more.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).parent / '.cache' / 'prices'
+CACHE_VERSION = 1
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_lock = threading.Lock()
+# cache dir -> {'stamp': refs.json mtime when read, 'refs': ..., 'dirty': bool,
+#               'replaced': hashes saves have moved tickers away from}
+_loaded = {}
+
+
+def _refs_path(cache_dir: Path) -> Path:
+    return cache_dir / 'refs.json'
+
+
+def _object_path(cache_dir: Path, digest: str) -> Path:
+    return cache_dir / 'objects' / f'{digest}.npz'
+
+
+def _read_refs(cache_dir: Path) -> dict:
+    path = _refs_path(cache_dir)
+    if not path.exists():
+        return {}
+    refs = json.loads(path.read_text())
+    if refs.get('version') != CACHE_VERSION:
+        return {}
+    return refs.get('tickers', {})
+
+
+def _write_refs(cache_dir: Path, refs: dict) -> None:
+    path = _refs_path(cache_dir)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps({'version': CACHE_VERSION, 'tickers': refs}, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _stamp(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _refs(cache_dir: Path) -> dict:
+    """The in-memory refs entry for a cache dir, re-read only if refs.json
+    changed on disk and there are no unflushed saves. Call with _lock held."""
+    entry = _loaded.get(cache_dir)
+    stamp = _stamp(_refs_path(cache_dir))
+    if entry is None or (not entry['dirty'] and entry['stamp'] != stamp):
+        entry = {'stamp': stamp, 'refs': _read_refs(cache_dir), 'dirty': False, 'replaced': set()}
+        _loaded[cache_dir] = entry
+    return entry
+
+
+def _ref(ticker: str, cache_dir: Path) -> dict | None:
+    with _lock:
+        return _refs(cache_dir)['refs'].get(ticker)
+
+
+def _to_arrays(hist: pd.DataFrame) -> dict:
+    index = hist.index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    arrays = {'dates': index.values.astype('datetime64[D]').astype(np.int64)}
+    for column in COLUMNS:
+        values = hist[column] if column in hist else np.full(len(hist), np.nan)
+        arrays[column] = np.asarray(values, dtype=np.float64)
+    return arrays
+
+
+def content_hash(arrays: dict) -> str:
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for key in ['dates', *COLUMNS]:
+        digest.update(key.encode())
+        digest.update(np.ascontiguousarray(arrays[key]).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def save(ticker: str, hist: pd.DataFrame, cache_dir: Path = CACHE_DIR) -> str:
+    """Store a raw history frame and point the ticker at it. Returns its hash."""
+    arrays = _to_arrays(hist)
+    digest = content_hash(arrays)
+    path = _object_path(cache_dir, digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        tmp = path.with_name(f'{digest}.{threading.get_ident()}.tmp.npz')
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    with _lock:
+        entry = _refs(cache_dir)
+        previous = entry['refs'].get(ticker, {}).get('hash')
+        entry['refs'][ticker] = {'hash': digest, 'fetched': datetime.now().isoformat()}
+        entry['dirty'] = True
+        if previous and previous != digest:
+            entry['replaced'].add(previous)
+
+    return digest
+
+
+def flush(cache_dir: Path = CACHE_DIR) -> None:
+    """Write the refs changed by save() to refs.json, then delete the
+    objects they replaced that no ticker points to any more."""
+    with _lock:
+        entry = _loaded.get(cache_dir)
+        if not entry or not entry['dirty']:
+            return
+        _write_refs(cache_dir, entry['refs'])
+        live = {ref['hash'] for ref in entry['refs'].values()}
+        for digest in entry['replaced'] - live:
+            _object_path(cache_dir, digest).unlink(missing_ok=True)
+        entry.update(stamp=_stamp(_refs_path(cache_dir)), dirty=False, replaced=set())
+
+
+@atexit.register
+def _flush_all() -> None:
+    for cache_dir in list(_loaded):
+        flush(cache_dir)
+
+
+def load(ticker: str, cache_dir: Path = CACHE_DIR) -> pd.DataFrame | None:
+    """Return the cached raw history for a ticker, or None if there is none."""
+    ref = _ref(ticker, cache_dir)
+    if not ref:
+        return None
+    path = _object_path(cache_dir, ref['hash'])
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        index = pd.DatetimeIndex(data['dates'].astype('datetime64[D]'), name='Date')
+        return pd.DataFrame({column: data[column] for column in COLUMNS}, index=index)
+
+
+def get_hash(ticker: str, cache_dir: Path = CACHE_DIR) -> str | None:
+    """Content hash of the ticker's cached history, for downstream invalidation."""
+    ref = _ref(ticker, cache_dir)
+    return ref['hash'] if ref else None
+
+
+def is_fresh(ticker: str, ttl: timedelta, cache_dir: Path = CACHE_DIR) -> bool:
+    ref = _ref(ticker, cache_dir)
+    if not ref:
+        return False
+    return datetime.now() - datetime.fromisoformat(ref['fetched']) < ttl
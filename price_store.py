@@ -0,0 +1,150 @@
+"""
+One binary file holding every ticker's published price series.
+
+build_data.py writes it row by row as tickers stream through the build,
+and build stages that need the series read it through PriceStore instead
+of parsing a JSON file per ticker. The layout is:
+
+    header   magic, version, counts, section offsets
+    days     int32 epoch days, every calendar day the build covers
+    closes   float32 matrix, one row per ticker over the shared days, NaN
+             where a ticker has no price
+    table    JSON list of [ticker, name, first, last] per matrix row
+
+The date axis is fixed before the first ticker is fetched, so rows can be
+written as they arrive without holding the others; the table goes last
+because only then is it known. Sections are 64-byte aligned and
+memory-mapped, so opening the store reads only the header and table, and
+a ticker's row is a view found through the table in constant time.
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+STORE_FILE = Path(__file__).parent / '.cache' / 'prices.bin'
+MAGIC = b'FIPRICES'
+VERSION = 2
+# magic, version, day count, row count, table size, days, closes and table offsets
+HEADER = struct.Struct('<8sIIIIQQQ')
+ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+class StoreWriter:
+    """Write a store one ticker at a time, over days first_day..last_day.
+
+    Rows go straight to a temporary file, so memory stays at one row
+    however many tickers there are; close() adds the table and moves the
+    file into place.
+    """
+
+    def __init__(self, first_day: int, last_day: int, path: Path = STORE_FILE):
+        self.path = path
+        self.tmp = path.with_suffix('.tmp')
+        self.days = np.arange(first_day, last_day + 1, dtype='<i4')
+        self.days_offset = _align(HEADER.size)
+        self.closes_offset = _align(self.days_offset + self.days.nbytes)
+        self.table = []
+        self.row = np.empty(len(self.days), dtype='<f4')
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.tmp, 'wb')
+        self.file.seek(self.days_offset)
+        self.file.write(self.days.tobytes())
+        self.file.seek(self.closes_offset)
+
+    def add(self, ticker: str, name: str, days: np.ndarray, closes: np.ndarray) -> bool:
+        """Append a ticker's series (sorted epoch days and closes). Returns
+        False, leaving it out, if the series falls outside the date axis."""
+        positions = np.asarray(days, dtype=np.int64) - int(self.days[0])
+        if not len(positions) or positions[0] < 0 or positions[-1] >= len(self.days):
+            return False
+
+        self.row.fill(np.nan)
+        self.row[positions] = closes
+        self.file.write(self.row.tobytes())
+        self.table.append([ticker, name, int(positions[0]), int(positions[-1])])
+        return True
+
+    def close(self) -> None:
+        table_offset = _align(self.closes_offset + len(self.table) * self.days.nbytes)
+        table_bytes = json.dumps(self.table, separators=(',', ':')).encode()
+        self.file.seek(table_offset)
+        self.file.write(table_bytes)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(self.days), len(self.table), len(table_bytes),
+                                    self.days_offset, self.closes_offset, table_offset))
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            self.tmp.unlink(missing_ok=True)
+
+
+class PriceStore:
+    """Read-only, memory-mapped view of a store written by StoreWriter."""
+
+    def __init__(self, path: Path = STORE_FILE):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            magic, version, day_count, ticker_count, table_size, days_offset, closes_offset, table_offset = (
+                HEADER.unpack(header))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} price store")
+            f.seek(table_offset)
+            table = json.loads(f.read(table_size))
+
+        self.path = path
+        self.rows = {ticker: (row, name, first, last) for row, (ticker, name, first, last) in enumerate(table)}
+        self.days = np.memmap(path, dtype='<i4', mode='r', offset=days_offset, shape=(day_count,))
+        self.closes = np.memmap(path, dtype='<f4', mode='r', offset=closes_offset, shape=(ticker_count, day_count))
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.rows
+
+    @property
+    def tickers(self) -> list:
+        return list(self.rows)
+
+    def name(self, ticker: str) -> str:
+        return self.rows[ticker][1]
+
+    def row(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        """Shared days and the ticker's closes between its first and last
+        price, as zero-copy views. Closes are NaN on days it has no price."""
+        row, _, first, last = self.rows[ticker]
+        return self.days[first:last + 1], self.closes[row, first:last + 1]
+
+    def series(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        """The ticker's own epoch days and closes, as int64 and float64 arrays.
+
+        Closes are rounded back to the cents the data files hold, which
+        float32 keeps exactly for prices below about 100,000.
+        """
+        days, closes = self.row(ticker)
+        present = ~np.isnan(closes)
+        return days[present].astype(np.int64), np.round(closes[present].astype(np.float64), 2)
+
+
+def open_store(path: Path = STORE_FILE) -> PriceStore | None:
+    """The store at `path`, or None if there is none (or it is unreadable)."""
+    if not path.exists():
+        return None
+    try:
+        return PriceStore(path)
+    except (ValueError, struct.error):
+        return None
@@ -2,6 +2,39 @@ export interface StockData {
   ticker: string
   name: string
   prices: Array<{ date: string; close: number }>
+  /** Epoch day (days since 1970-01-01 UTC) of each price, for binary search */
+  days: Int32Array
+}
+
+/**
+ * Compact form written by build_data.py. `days` is delta-encoded epoch days
+ * (the first entry is absolute) and closes are integers in hundredths.
+ */
+export interface ColumnarStockData {
+  ticker: string
+  name: string
+  scale: number
+  days: number[]
+  close: number[]
+}
+
+/**
+ * The price history at a few resolutions, written by analytics.py to
+ * {ticker}.lod.json: daily for the last year, weekly for five years and
+ * monthly for the full history, each level in the columnar encoding.
+ */
+export interface LodLevel {
+  /** Years covered, or null for the full history */
+  years: number | null
+  days: number[]
+  close: number[]
+}
+
+export interface LodData {
+  ticker: string
+  name: string
+  scale: number
+  levels: Record<string, LodLevel>
 }
 
 export interface CalculationResult {
@@ -12,7 +45,221 @@ export interface CalculationResult {
   history: Array<{ date: string; value: number }>
 }
 
+/**
+ * Value of 1 kr invested over each standard period, sampled to chart
+ * resolution. Written per ticker by analytics.py to {ticker}.growth.json.
+ */
+export interface GrowthPeriod {
+  startDate: string
+  startPrice: number
+  endPrice: number
+  dates: string[]
+  growth: number[]
+}
+
+export interface GrowthData {
+  ticker: string
+  name: string
+  periods: Record<string, GrowthPeriod>
+}
+
+/**
+ * Outcome of investing 1 kr every month over a standard period, written per
+ * ticker by analytics.py to {ticker}.dca.json. `invested` and `value` are
+ * per 1 kr a month at each chart point, so any amount is a multiplication.
+ */
+export interface SavingsPeriod {
+  startDate: string
+  months: number
+  /** Units bought in total by 1 kr a month */
+  units: number
+  endPrice: number
+  dates: string[]
+  invested: number[]
+  value: number[]
+}
+
+export interface SavingsData {
+  ticker: string
+  name: string
+  periods: Record<string, SavingsPeriod>
+}
+
+export interface MonthlyResult {
+  ticker: string
+  monthly: number
+  months: number
+  invested: number
+  finalValue: number
+  history: Array<{ date: string; value: number; invested: number }>
+}
+
+/** One holding period picked out of a rolling window. */
+export interface RollingPeriod {
+  return: number
+  cagr: number
+  startDate: string
+  endDate: string
+}
+
+/**
+ * Best, worst and median return over every rolling 1, 5, 10 and 20 years,
+ * written per ticker by analytics.py to {ticker}.stats.json. A window is
+ * null when the history is shorter than it.
+ */
+export interface RollingStats {
+  ticker: string
+  windows: Record<string, { periods: number; best: RollingPeriod; worst: RollingPeriod; median: RollingPeriod } | null>
+}
+
+/** Per-period returns for every ticker, written by analytics.py to summary.json. */
+export interface PeriodSummary {
+  startDate: string
+  startPrice: number
+  endPrice: number
+  finalValue: number
+  cagr: number | null
+  /** Deepest peak-to-trough fall within the period, as a negative fraction */
+  maxDrawdown: number | null
+}
+
+export interface StockSummary {
+  name: string
+  firstDate: string
+  lastDate: string
+  points: number
+  /** Headline outcome shown on the OG image */
+  best: { finalValue: number; years: number; startDate: string; sinceStart: boolean }
+  maxDrawdown: { depth: number; peakDate: string; troughDate: string } | null
+  /** Periods reaching back before the data start from the first price, as in calculate() */
+  periods: Record<string, PeriodSummary>
+}
+
+export interface Summary {
+  amount: number
+  periods: string[]
+  stocks: Record<string, StockSummary>
+  updated: string
+}
+
 const dataCache = new Map<string, StockData>()
+const growthCache = new Map<string, GrowthData | null>()
+const savingsCache = new Map<string, SavingsData | null>()
+const lodCache = new Map<string, Array<{ years: number | null; data: StockData }> | null>()
+let summaryPromise: Promise<Summary> | null = null
+
+export function loadSummary(): Promise<Summary> {
+  if (!summaryPromise) {
+    summaryPromise = fetch('/data/summary.json').then(response => {
+      if (!response.ok) {
+        summaryPromise = null
+        throw new Error('Failed to load summary')
+      }
+      return response.json()
+    })
+  }
+  return summaryPromise
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+export function decodeColumnar(data: ColumnarStockData): StockData {
+  const count = data.days.length
+  const prices: StockData['prices'] = new Array(count)
+  const days = new Int32Array(count)
+  let day = 0
+
+  for (let i = 0; i < count; i++) {
+    day += data.days[i]
+    days[i] = day
+    prices[i] = {
+      date: new Date(day * DAY_MS).toISOString().slice(0, 10),
+      close: data.close[i] / data.scale,
+    }
+  }
+
+  return { ticker: data.ticker, name: data.name, prices, days }
+}
+
+/** First index whose day starts after `time` (ms), or days.length. */
+function upperBound(days: Int32Array, time: number): number {
+  let lo = 0
+  let hi = days.length
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1
+    if (days[mid] * DAY_MS <= time) {
+      lo = mid + 1
+    } else {
+      hi = mid
+    }
+  }
+  return lo
+}
+
+/**
+ * Index of the price closest to `targetTime`, ignoring prices more than a
+ * week after it. Ties go to the earlier price; falls back to 0.
+ */
+export function findClosestDayIndex(days: Int32Array, targetTime: number): number {
+  const last = upperBound(days, targetTime + 7 * DAY_MS) - 1
+  if (last < 0) return 0
+
+  const before = upperBound(days, targetTime) - 1
+  if (before < 0) return 0
+  if (before === last) return before
+
+  const diffBefore = targetTime - days[before] * DAY_MS
+  const diffAfter = days[before + 1] * DAY_MS - targetTime
+  return diffAfter < diffBefore ? before + 1 : before
+}
+
+/**
+ * Result for `amount` invested over a precomputed period. Periods end at the
+ * latest price, as in summary.json, and the history is already sampled to
+ * the points GrowthChart plots.
+ */
+export function scaleGrowth(ticker: string, amount: number, period: GrowthPeriod): CalculationResult {
+  const { dates, growth } = period
+  const history: CalculationResult['history'] = new Array(dates.length)
+  for (let i = 0; i < dates.length; i++) {
+    history[i] = { date: dates[i], value: amount * growth[i] }
+  }
+
+  return {
+    ticker,
+    startPrice: period.startPrice,
+    endPrice: period.endPrice,
+    finalValue: (amount / period.startPrice) * period.endPrice,
+    history,
+  }
+}
+
+/** Result for `monthly` kr invested every month over a precomputed period. */
+export function scaleSavings(ticker: string, monthly: number, period: SavingsPeriod): MonthlyResult {
+  const { dates, invested, value } = period
+  const history: MonthlyResult['history'] = new Array(dates.length)
+  for (let i = 0; i < dates.length; i++) {
+    history[i] = { date: dates[i], value: monthly * value[i], invested: monthly * invested[i] }
+  }
+
+  return {
+    ticker,
+    monthly,
+    months: period.months,
+    invested: monthly * period.months,
+    finalValue: monthly * period.units * period.endPrice,
+    history,
+  }
+}
+
+/** Epoch day of the same day of the month `months` later, clipped to shorter months. */
+function addMonths(day: number, months: number): number {
+  const date = new Date(day * DAY_MS)
+  const year = date.getUTCFullYear()
+  const month = date.getUTCMonth() + months
+  const monthDays = new Date(Date.UTC(year, month + 1, 0)).getUTCDate()
+  return Date.UTC(year, month, Math.min(date.getUTCDate(), monthDays)) / DAY_MS
+}
 
 export class Calculator {
   async loadStockData(ticker: string): Promise<StockData> {
@@ -20,24 +267,151 @@ export class Calculator {
       return dataCache.get(ticker)!
     }
 
+    const columnar = await fetch(`/data/${ticker}.col.json`)
+    if (columnar.ok) {
+      const data = decodeColumnar(await columnar.json())
+      dataCache.set(ticker, data)
+      return data
+    }
+
     const response = await fetch(`/data/${ticker}.json`)
     if (!response.ok) {
       throw new Error(`Failed to load data for ${ticker}`)
     }
 
     const data = await response.json()
+    data.days = Int32Array.from(data.prices, (p: { date: string }) => Date.parse(p.date) / DAY_MS)
     dataCache.set(ticker, data)
     return data
   }
 
-  async calculate(ticker: string, amount: number, years: number): Promise<CalculationResult> {
+  /** Precomputed growth series, or null if the build did not write one. */
+  async loadGrowthData(ticker: string): Promise<GrowthData | null> {
+    if (growthCache.has(ticker)) {
+      return growthCache.get(ticker)!
+    }
+
+    const response = await fetch(`/data/${ticker}.growth.json`)
+    const data: GrowthData | null = response.ok ? await response.json() : null
+    growthCache.set(ticker, data)
+    return data
+  }
+
+  /** Decoded LOD levels from finest to coarsest, or null if the build did not write them. */
+  async loadLodLevels(ticker: string): Promise<Array<{ years: number | null; data: StockData }> | null> {
+    if (lodCache.has(ticker)) {
+      return lodCache.get(ticker)!
+    }
+
+    const response = await fetch(`/data/${ticker}.lod.json`)
+    const lod: LodData | null = response.ok ? await response.json() : null
+    const levels = lod && Object.values(lod.levels).map(level => ({
+      years: level.years,
+      data: decodeColumnar({ ticker, name: lod.name, scale: lod.scale, days: level.days, close: level.close }),
+    }))
+    lodCache.set(ticker, levels)
+    return levels
+  }
+
+  /** Precomputed monthly-savings tables, or null if the build did not write them. */
+  async loadSavingsData(ticker: string): Promise<SavingsData | null> {
+    if (savingsCache.has(ticker)) {
+      return savingsCache.get(ticker)!
+    }
+
+    const response = await fetch(`/data/${ticker}.dca.json`)
+    const data: SavingsData | null = response.ok ? await response.json() : null
+    savingsCache.set(ticker, data)
+    return data
+  }
+
+  /** Invest `monthly` kr every month for `years`; see SavingsPeriod. */
+  async calculateMonthly(ticker: string, monthly: number, years: number): Promise<MonthlyResult> {
+    const savings = await this.loadSavingsData(ticker)
+    const period = savings?.periods[String(years)]
+    return period ? scaleSavings(ticker, monthly, period) : this.calculateMonthlyFromPrices(ticker, monthly, years)
+  }
+
+  /**
+   * Simulate the monthly purchases over the full price series, as
+   * analytics.monthly_savings does; for periods without a precomputed table.
+   */
+  async calculateMonthlyFromPrices(ticker: string, monthly: number, years: number): Promise<MonthlyResult> {
+    const data = await this.loadStockData(ticker)
+    const { prices, days } = data
+    const last = days.length - 1
+
+    const target = new Date(days[last] * DAY_MS)
+    target.setUTCFullYear(target.getUTCFullYear() - years)
+    const start = findClosestDayIndex(days, target.getTime())
+
+    const history: MonthlyResult['history'] = []
+    let units = 0
+    let months = 0
+    for (let month = 0; month < 12 * years; month++) {
+      const day = addMonths(days[start], month)
+      if (day > days[last]) break
+      const i = upperBound(days, (day - 1) * DAY_MS)
+      units += 1 / prices[i].close
+      months++
+      history.push({ date: prices[i].date, value: monthly * units * prices[i].close, invested: monthly * months })
+    }
+
+    const finalValue = monthly * units * prices[last].close
+    if (history[history.length - 1].date !== prices[last].date) {
+      history.push({ date: prices[last].date, value: finalValue, invested: monthly * months })
+    }
+
+    return { ticker, monthly, months, invested: monthly * months, finalValue, history }
+  }
+
+  /**
+   * With `dates`, the history is valued on exactly those dates instead of
+   * the ticker's own chart points, so a comparison series (the market) can
+   * be plotted index by index against another result's history.
+   */
+  async calculate(ticker: string, amount: number, years: number, dates?: string[]): Promise<CalculationResult> {
+    const growth = await this.loadGrowthData(ticker)
+    const period = growth?.periods[String(years)]
+    const result = period ? scaleGrowth(ticker, amount, period) : await this.calculateFromPrices(ticker, amount, years)
+    return dates ? { ...result, history: await this.historyOn(result, amount, dates) } : result
+  }
+
+  /**
+   * Value of a result's holding on each of `dates`, from the last price on or
+   * before the date: the daily or weekly LOD level when it reaches back to
+   * the first date, else the full series (the monthly level is too coarse).
+   * Dates up to the result's start keep the amount.
+   */
+  private async historyOn(result: CalculationResult, amount: number, dates: string[]): Promise<CalculationResult['history']> {
+    const first = Date.parse(dates[0])
+    const levels = await this.loadLodLevels(result.ticker)
+    const level = levels?.find(l => l.years !== null && l.data.days.length && l.data.days[0] * DAY_MS <= first)
+    const { prices, days } = level ? level.data : await this.loadStockData(result.ticker)
+
+    const start = Date.parse(result.history[0].date)
+    const shares = amount / result.startPrice
+    return dates.map(date => {
+      const time = Date.parse(date)
+      const i = upperBound(days, time) - 1
+      const value = time <= start || i < 0 ? amount : shares * prices[i].close
+      return { date, value }
+    })
+  }
+
+  /**
+   * Slice the full price series; for periods without a precomputed growth
+   * series. The history is taken from the coarsest LOD level that covers
+   * the period, when there is one, so long periods stay cheap to chart.
+   */
+  async calculateFromPrices(ticker: string, amount: number, years: number): Promise<CalculationResult> {
     const data = await this.loadStockData(ticker)
 
     const startDate = new Date()
     startDate.setFullYear(startDate.getFullYear() - years)
 
     const prices = data.prices
-    const startIdx = this.findClosestDateIndex(prices, startDate)
+    const startIdx = findClosestDayIndex(data.days, startDate.getTime())
     const endIdx = prices.length - 1
 
     if (startIdx === -1 || endIdx < startIdx) {
@@ -49,10 +423,21 @@ export class Calculator {
     const shares = amount / startPrice
     const finalValue = shares * endPrice
 
-    const history = prices.slice(startIdx, endIdx + 1).map(p => ({
-      date: p.date,
-      value: shares * p.close,
-    }))
+    const levels = await this.loadLodLevels(ticker)
+    const level = levels?.find(l => l.years === null || l.years >= years)
+    let history: CalculationResult['history']
+    if (level) {
+      const after = upperBound(level.data.days, data.days[startIdx] * DAY_MS)
+      history = [{ date: prices[startIdx].date, value: amount }]
+      for (const p of level.data.prices.slice(after)) {
+        history.push({ date: p.date, value: shares * p.close })
+      }
+    } else {
+      history = prices.slice(startIdx, endIdx + 1).map(p => ({
+        date: p.date,
+        value: shares * p.close,
+      }))
+    }
 
     return {
       ticker,
@@ -62,22 +447,4 @@ export class Calculator {
       history,
     }
   }
-
-  private findClosestDateIndex(prices: Array<{ date: string; close: number }>, targetDate: Date): number {
-    const targetTime = targetDate.getTime()
-    let closestIdx = 0
-    let closestDiff = Infinity
-
-    for (let i = 0; i < prices.length; i++) {
-      const priceDate = new Date(prices[i].date).getTime()
-      const diff = Math.abs(priceDate - targetTime)
-
-      if (diff < closestDiff && priceDate <= targetTime + 7 * 24 * 60 * 60 * 1000) {
-        closestDiff = diff
-        closestIdx = i
-      }
-    }
-
-    return closestIdx
-  }
 }
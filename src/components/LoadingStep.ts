@@ -88,7 +88,7 @@ export class LoadingStep extends Step {
 
       let marketResult = null
       if (stock !== MARKET_TICKER) {
-        marketResult = await this.calculator.calculate(MARKET_TICKER, amount, years)
+        marketResult = await this.calculator.calculate(MARKET_TICKER, amount, years, result.history.map(p => p.date))
       }
 
       journeyStore.setResults(result, marketResult)
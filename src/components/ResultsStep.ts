@@ -368,7 +368,7 @@ export class ResultsStep extends Step {
       const result = await this.calculator.calculate(stock, amount, years)
       let marketResult = null
       if (stock !== MARKET_TICKER) {
-        marketResult = await this.calculator.calculate(MARKET_TICKER, amount, years)
+        marketResult = await this.calculator.calculate(MARKET_TICKER, amount, years, result.history.map(p => p.date))
       }
 
       // Update display
@@ -1,5 +1,6 @@
 import '../style.css'
-import { Calculator } from '../calculator'
+import { loadSummary } from '../calculator'
+import type { Summary } from '../calculator'
 import { STOCKS, getSlugByTicker } from '../config/stocks'
 import type { StockOption } from '../config/stocks'
 import { track } from '../config/analytics'
@@ -34,25 +35,31 @@ const DEFAULT_PERIOD: Period = 10
     </div>
   `
 
-  const calc = new Calculator()
+  // Without the summary every stock renders without a return, as a stock
+  // whose data fails to load does
+  let summary: Summary | null = null
+  try {
+    summary = await loadSummary()
+  } catch (error) {
+    console.error('Failed to load summary:', error)
+  }
   const cache = new Map<Period, StockWithReturn[]>()
   let activePeriod: Period = DEFAULT_PERIOD
 
-  async function fetchPeriod(years: Period): Promise<StockWithReturn[]> {
+  // Full price series are only loaded on the stock pages; the table is
+  // rendered from the precomputed per-period summary.
+  function resultsForPeriod(years: Period): StockWithReturn[] {
     if (cache.has(years)) return cache.get(years)!
 
-    const results: StockWithReturn[] = await Promise.all(
-      STOCKS.map(async (stock): Promise<StockWithReturn> => {
-        const slug = getSlugByTicker(stock.ticker) ?? stock.ticker.toLowerCase()
-        try {
-          const result = await calc.calculate(stock.ticker, INVEST_AMOUNT, years)
-          const returnPct = ((result.finalValue - INVEST_AMOUNT) / INVEST_AMOUNT) * 100
-          return { stock, slug, returnPct, finalValue: result.finalValue }
-        } catch {
-          return { stock, slug, returnPct: null, finalValue: null }
-        }
-      })
-    )
+    const results: StockWithReturn[] = STOCKS.map((stock): StockWithReturn => {
+      const slug = getSlugByTicker(stock.ticker) ?? stock.ticker.toLowerCase()
+      const period = summary?.stocks[stock.ticker]?.periods[String(years)]
+      if (!period) {
+        return { stock, slug, returnPct: null, finalValue: null }
+      }
+      const growth = period.endPrice / period.startPrice
+      return { stock, slug, returnPct: (growth - 1) * 100, finalValue: INVEST_AMOUNT * growth }
+    })
 
     results.sort((a, b) => {
       if (a.returnPct === null && b.returnPct === null) return 0
@@ -142,36 +149,12 @@ const DEFAULT_PERIOD: Period = 10
     const listContainer = document.getElementById('overview-list-container')
     if (!listContainer) return
 
-    const cached = cache.get(years)
-    if (cached) {
-      // Instant swap with a quick fade
-      listContainer.classList.add('overview-fade-out')
-      await new Promise(r => setTimeout(r, 120))
-      listContainer.innerHTML = renderList(cached, years)
-      listContainer.classList.remove('overview-fade-out')
-    } else {
-      // Rare: show brief loading state while fetching
-      listContainer.classList.add('overview-fade-out')
-      await new Promise(r => setTimeout(r, 120))
-      listContainer.innerHTML = `
-        <div class="flex justify-center py-8">
-          <div class="loading-spinner"></div>
-        </div>
-      `
-      listContainer.classList.remove('overview-fade-out')
-      const results = await fetchPeriod(years)
-      listContainer.classList.add('overview-fade-out')
-      await new Promise(r => setTimeout(r, 120))
-      listContainer.innerHTML = renderList(results, years)
-      listContainer.classList.remove('overview-fade-out')
-    }
+    // Quick fade while swapping in the precomputed results
+    listContainer.classList.add('overview-fade-out')
+    await new Promise(r => setTimeout(r, 120))
+    listContainer.innerHTML = renderList(resultsForPeriod(years), years)
+    listContainer.classList.remove('overview-fade-out')
   }
 
-  // Fetch default period first, render, then pre-fetch others in background
-  const defaultResults = await fetchPeriod(DEFAULT_PERIOD)
-  renderFull(defaultResults, DEFAULT_PERIOD)
-
-  // Pre-fetch remaining periods in background (non-blocking)
-  const otherPeriods = PERIODS.filter(p => p !== DEFAULT_PERIOD)
-  Promise.all(otherPeriods.map(p => fetchPeriod(p)))
+  renderFull(resultsForPeriod(DEFAULT_PERIOD), DEFAULT_PERIOD)
 })()
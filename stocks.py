@@ -0,0 +1,57 @@
+"""
+The one list of stocks the build knows about.
+
+build_data.py fetches every ticker in NAMES; the ones in SLUGS also get
+their own page, OG image and sitemap entry, in that order. The frontend
+keeps its own copy in src/config/stocks.ts. load_summary() reads back the
+analytics build_data.py writes for them, for the page generators.
+"""
+
+import json
+from pathlib import Path
+
+SUMMARY_FILE = Path(__file__).parent / 'public' / 'data' / 'summary.json'
+
+NAMES = {
+    # Market
+    '^GSPC': 'S&P 500',
+    # Danish
+    'NOVO-B.CO': 'Novo Nordisk',
+    'MAERSK-B.CO': 'Mærsk',
+    'DSV.CO': 'DSV',
+    'CARL-B.CO': 'Carlsberg',
+    'DANSKE.CO': 'Danske Bank',
+    # Big tech
+    'AAPL': 'Apple',
+    'AMZN': 'Amazon',
+    'GOOGL': 'Google',
+    'META': 'Meta',
+    'NFLX': 'Netflix',
+    'MSFT': 'Microsoft',
+    # Meme
+    'GME': 'GameStop',
+    'TSLA': 'Tesla',
+    'NVDA': 'NVIDIA',
+}
+TICKERS = list(NAMES)
+
+SLUGS = {
+    'NOVO-B.CO': 'novo-nordisk',
+    'DSV.CO': 'dsv',
+    'CARL-B.CO': 'carlsberg',
+    'NVDA': 'nvidia',
+    'AAPL': 'apple',
+    'MSFT': 'microsoft',
+    'GOOGL': 'google',
+    'AMZN': 'amazon',
+    'NFLX': 'netflix',
+}
+STOCKS = [{'ticker': ticker, 'name': NAMES[ticker], 'slug': slug} for ticker, slug in SLUGS.items()]
+
+
+def load_summary(path: Path = SUMMARY_FILE) -> dict:
+    """Per-stock analytics written by build_data.py (see analytics.py), or {}
+    before the first data build."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))